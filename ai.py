@@ -1,61 +1,555 @@
+import contextlib
+import cProfile
+import json
+import pstats
 import random
+import time
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时只使用逐格评估
+    np = None
 from common import Game, SCREEN_SIZE, GRID_SIZE, BOARD_SIZE, MARGIN
+from common import DIRECTIONS, LINE_LENGTH, line_codes
+from common import FIVE, OPEN_FOUR, FOUR, opponent_of
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from threat_space import ThreatSpaceSearch, CACHE_ENTRY_BYTES
+from opening_book import get_opening_book
 
-def ai_move(game):
-    print("AI 正在思考...")
-    best_score = float('-inf')
-    best_moves = []
-    
+AI_TIME_LIMIT = 2.0   # 每步思考时间上限（秒）
+AI_WORKERS = 1        # 根节点并行搜索的进程数，1 表示在当前进程内搜索
+AI_ENGINE = "alphabeta"  # 主搜索引擎："alphabeta" 或 "mcts"
+MAX_DEPTH = 8         # 迭代加深的最大深度
+BRANCH_LIMIT = 12     # 每层只展开评分最高的若干候选
+KILLER_SLOTS = 1      # 每层保留的杀手着法数，多保留的杀手排在静态评分更高的着法前面，反而增加节点
+WIN_SCORE = 10000000  # 必胜局面的分值，减去步数以偏好更快的胜利
+TT_SIZE_MB = 16       # 置换表内存上限（MB）
+BATCH_EVAL_MIN_MOVES = 48  # 候选数不少于此值且装有 NumPy 时改用整盘评估
+AI_STATS_LOG = None   # 设为文件路径时，每步的统计记录以 JSON 行追加写入
+
+# 难度等级：每级对应一组 choose_move 参数，用节点数或时间预算限制可随时中断的搜索
+DIFFICULTY_LEVELS = {
+    # 只看一层，不算必胜；节点数和时间预算用于 MCTS（max_nodes 即模拟次数），一层搜索用不满
+    "easy": {"max_depth": 1, "max_nodes": 100, "time_limit": 0.2, "use_book": False, "forced_wins": False},
+    "normal": {"max_nodes": 1500, "time_limit": 0.5},
+    "hard": {"max_nodes": 15000, "time_limit": 1.0},
+    "master": {},  # 完整的时间预算
+}
+DEFAULT_DIFFICULTY = "master"
+
+_transposition_table = None
+_threat_solver = ThreatSpaceSearch()
+rng = random.Random()  # 开局库选点用的随机数，基准测试时用 set_seed 固定
+last_search = None     # 最近一次 choose_move 使用的 AlphaBetaSearch，着法由战术检查决定时为 None
+last_stats = None      # 最近一次 choose_move 的统计记录，见 move_stats
+profile_hook = None    # 返回上下文管理器的函数（如 cprofile_hook），设置后只对 AI 的思考过程做性能分析
+
+def set_seed(seed):
+    """固定 AI 中所有随机选择的种子，使结果可以复现"""
+    rng.seed(seed)
+    from mcts import get_mcts_engine
+    get_mcts_engine().rng.seed(seed)
+
+def get_transposition_table():
+    """进程内共享的置换表，第一次使用时才分配内存"""
+    global _transposition_table
+    if _transposition_table is None:
+        _transposition_table = TranspositionTable(TT_SIZE_MB)
+    return _transposition_table
+
+def set_memory_limit(size_mb):
+    """按内存预算（MB）重新分配置换表和必胜搜索的证明缓存，两者各占一半"""
+    global _transposition_table
+    _transposition_table = TranspositionTable(max(1, size_mb / 2))
+    _threat_solver.max_cache = max(1000, int(size_mb / 2 * 1024 * 1024) // CACHE_ENTRY_BYTES)
+    _threat_solver.cache.clear()
+
+class EngineState:
+    """一个 AI 独占的搜索状态：置换表、必胜搜索的证明缓存和 MCTS 搜索树，比赛中每个引擎各用一份"""
+    def __init__(self):
+        self.transposition_table = None  # 第一次搜索时才分配
+        self.threat_solver = ThreatSpaceSearch()
+        self.mcts_engine = None
+
+_engine_state = None  # 当前使用的 EngineState，None 表示一直使用进程内共享的状态
+
+def use_engine_state(state):
+    """之后的搜索改用 state 中的状态；切换前把当前状态保存回它自己的 EngineState"""
+    global _engine_state, _transposition_table, _threat_solver
+    import mcts
+    if _engine_state is not None:
+        _engine_state.transposition_table = _transposition_table
+        _engine_state.threat_solver = _threat_solver
+        _engine_state.mcts_engine = mcts._engine
+    _engine_state = state
+    _transposition_table = state.transposition_table
+    _threat_solver = state.threat_solver
+    mcts._engine = state.mcts_engine
+
+class SearchTimeout(Exception):
+    """搜索超过时间或节点预算，用于从递归中退出"""
+
+def ai_move(game, time_limit=AI_TIME_LIMIT, workers=AI_WORKERS):
+    move = profiled_choose_move(game, time_limit, workers)
+    if move:
+        stats = last_stats
+        print(f"AI 落子 {move}: {stats['source']}, 深度 {stats['depth']}, 节点 {stats['nodes']}, "
+              f"用时 {stats['time']:.2f}s")
+        return game.update_board(*move)
+    else:
+        print("AI 没有可用的移动")
+
+def profiled_choose_move(game, *args, **kwargs):
+    """在 profile_hook 中调用 choose_move，分析结果里只有 AI 的思考过程"""
+    if profile_hook is None:
+        return choose_move(game, *args, **kwargs)
+    with profile_hook():
+        return choose_move(game, *args, **kwargs)
+
+@contextlib.contextmanager
+def cprofile_hook(path=None, limit=20):
+    """用 cProfile 分析一次思考；给出 path 时保存结果，否则打印累计耗时最多的 limit 个函数
+
+    只分析调用它的线程，可以直接用在后台的 AI 线程里：
+        ai.profile_hook = ai.cprofile_hook
+        ai.profile_hook = functools.partial(ai.cprofile_hook, "ai.prof")
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+
+def choose_move(game, time_limit=AI_TIME_LIMIT, workers=AI_WORKERS, stop_event=None, use_book=True,
+                engine=AI_ENGINE, max_depth=MAX_DEPTH, max_nodes=None, forced_wins=True, record=True):
+    """计算 AI 的着法但不落子；stop_event 被设置时尽快返回当前最佳着法
+
+    max_nodes 限制搜索节点数（MCTS 为模拟次数），forced_wins 为 False 时不做 VCF/VCT 必胜搜索。
+    每次调用后 last_search 和 last_stats 保存这一步的搜索和统计记录，设置了 AI_STATS_LOG 时同时写入文件；
+    record 为 False 时（例如后台预算）不记录，也不写文件。
+    """
+    global last_search, last_stats
+    stats = {"source": None, "nodes": 0, "depth": 0, "win_check_time": 0.0}
+    start = time.perf_counter()
+    # 整步共用一个截止时间：必胜搜索用掉的时间从后面的主搜索中扣除
+    deadline = start + time_limit
+    move, search = _select_move(game, stats, deadline, workers, stop_event, use_book, engine, max_depth,
+                                max_nodes, forced_wins)
+    if not record:
+        return move
+    last_search = search
+    last_stats = move_stats(game, move, stats, time.perf_counter() - start, search)
+    if AI_STATS_LOG:
+        write_stats(last_stats, AI_STATS_LOG)
+    return move
+
+def _select_move(game, stats, deadline, workers, stop_event, use_book, engine, max_depth, max_nodes,
+                 forced_wins):
+    """choose_move 的决策过程，返回 (着法, AlphaBetaSearch)，着法来源和搜索规模写入 stats；
+    着法不是由单进程 Alpha-Beta 搜索得出时 AlphaBetaSearch 为 None
+    """
+    clock = time.perf_counter()
     # 检查是否有立即获胜的机会
     winning_move = find_winning_move(game, game.current_player)
     if winning_move:
-        return game.update_board(*winning_move)
+        stats["source"] = "win"
+        return winning_move, None
     
     # 检查是否需要阻止对手获胜
-    opponent = 'White' if game.current_player == 'Black' else 'Black'
+    opponent = opponent_of(game.current_player)
     blocking_move = find_winning_move(game, opponent)
+    stats["win_check_time"] += time.perf_counter() - clock
     if blocking_move:
-        return game.update_board(*blocking_move)
+        stats["source"] = "block"
+        return blocking_move, None
     
-    # 如果没有紧急情况，评估所有可能的移动
-    for i in range(BOARD_SIZE):
-        for j in range(BOARD_SIZE):
-            if game.is_valid_move(i, j):
-                score = evaluate_move(game, i, j)
-                if score > best_score:
-                    best_score = score
-                    best_moves = [(i, j)]
-                elif score == best_score:
-                    best_moves.append((i, j))
+    # 开局阶段先查开局库
+    book = get_opening_book() if use_book else None
+    if book:
+        book_move = book.lookup(game, rng)
+        if book_move:
+            stats["source"] = "book"
+            return book_move, None
     
-    if best_moves:
-        row, col = random.choice(best_moves)
-        return game.update_board(row, col)
-    else:
-        print("AI 没有可用的移动")
+    # 尝试用连续冲四或活三算出必胜
+    if forced_wins:
+        clock = time.perf_counter()
+        forced_move = find_forced_win(game, stop_event, deadline)
+        stats["win_check_time"] += time.perf_counter() - clock
+        if forced_move:
+            stats["source"] = "forced"
+            stats["nodes"] = _threat_solver.nodes
+            return forced_move, None
+    
+    # 如果没有紧急情况，用剩下的时间进行搜索
+    time_limit = max(0.0, deadline - time.perf_counter())
+    stats["source"] = engine if workers <= 1 or engine == "mcts" else "parallel"
+    if engine == "mcts":
+        from mcts import get_mcts_engine, MCTS_PLAYOUTS
+        mcts_engine = get_mcts_engine()
+        move = mcts_engine.best_move(game, max_nodes or MCTS_PLAYOUTS, time_limit, stop_event)
+        stats["nodes"] = mcts_engine.playouts
+        return move, None
+    if workers > 1:
+        from parallel_search import parallel_search
+        move, stats["depth"], stats["nodes"] = parallel_search(game, time_limit, workers, max_depth, stop_event)
+        return move, None
+    search = AlphaBetaSearch(game, time_limit, max_depth, stop_event=stop_event, max_nodes=max_nodes)
+    return search.best_move(), search
+
+def move_stats(game, move, stats, elapsed, search=None):
+    """一步棋的统计记录：着法来源、节点数、深度、评估次数、置换表命中率、分支因子和各部分耗时
+
+    耗时分为走法生成（含排序）、局面评估和胜负检查（成五/堵五、VCF/VCT 和搜索中的终局判断），
+    其余（落子与撤销、置换表读写）计入 other_time。
+    """
+    record = {
+        "ply": len(game.move_history),
+        "player": game.current_player,
+        "move": list(move) if move else None,
+        "source": stats["source"],
+        "time": elapsed,
+        "nodes": stats["nodes"],
+        "depth": stats["depth"],
+        "eval_calls": 0,
+        "tt_hit_rate": None,
+        "branching_factor": None,
+        "movegen_time": 0.0,
+        "eval_time": 0.0,
+        "win_check_time": stats["win_check_time"],
+    }
+    if search is not None:
+        search_stats = search.stats()
+        for key in ("nodes", "depth", "eval_calls", "tt_hit_rate", "branching_factor", "movegen_time",
+                    "eval_time"):
+            record[key] = search_stats[key]
+        record["win_check_time"] += search_stats["win_check_time"]
+    record["other_time"] = max(0.0, elapsed - record["movegen_time"] - record["eval_time"]
+                               - record["win_check_time"])
+    record["nodes_per_second"] = record["nodes"] / elapsed if elapsed > 0 else 0.0
+    return record
+
+def write_stats(record, path):
+    """把一条统计记录以 JSON 行追加到 path"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
 def find_winning_move(game, player):
-    for i in range(BOARD_SIZE):
-        for j in range(BOARD_SIZE):
-            if game.is_valid_move(i, j):
-                game.board[i][j] = player
-                if game.check_winner(i, j):
-                    game.board[i][j] = None
-                    return (i, j)
-                game.board[i][j] = None
+    # 威胁索引中记录了所有落子即成五的空位
+    for move in game.threats[player][FIVE]:
+        return move
+    return None
+
+def find_forced_win(game, stop_event=None, deadline=None):
+    """先找连续冲四（VCF），再找连续活三冲四（VCT）；deadline 为 perf_counter 截止时间"""
+    return (_threat_solver.find_vcf(game, stop_event=stop_event, deadline=deadline)
+            or _threat_solver.find_vct(game, stop_event=stop_event, deadline=deadline))
+
+def generate_moves(game):
+    """已有棋子周围两格内的空位（由 Game 增量维护）；空棋盘时下天元"""
+    if not game.move_history:
+        return [(BOARD_SIZE // 2, BOARD_SIZE // 2)]
+    return list(game.candidates)
+
+def scored_moves(game):
+    """候选着法及其 evaluate_move 分值，按分值从高到低排序"""
+    moves = generate_moves(game)
+    if np is not None and len(moves) >= BATCH_EVAL_MIN_MOVES:
+        scores = evaluate_board(game).tolist()
+        scored = [(move, scores[move[0]][move[1]]) for move in moves]
+    else:
+        scored = [(move, evaluate_move(game, *move)) for move in moves]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+def forced_moves(game):
+    """能成五就只走成五，对手能成五就只能去堵；都没有时返回 None"""
+    winning_moves = game.threats[game.current_player][FIVE]
+    if winning_moves:
+        return [next(iter(winning_moves))]
+    blocking_moves = game.threats[opponent_of(game.current_player)][FIVE]
+    if blocking_moves:
+        return list(blocking_moves)
     return None
 
+def ordered_moves(game, hash_move=None):
+    """按 evaluate_move 从高到低排序，只保留前 BRANCH_LIMIT 个；置换表着法排在最前"""
+    moves = forced_moves(game)
+    if moves is not None:
+        return moves
+    moves = [move for move, _ in scored_moves(game)[:BRANCH_LIMIT]]
+    if hash_move in moves:
+        moves.remove(hash_move)
+        moves.insert(0, hash_move)
+    elif hash_move and game.is_valid_move(*hash_move):
+        moves.insert(0, hash_move)
+    return moves
+
+def score_to_tt(score, ply):
+    """胜负分值按距根节点的步数修正，使其在不同路径下都可复用"""
+    if score > WIN_SCORE - 1000:
+        return score + ply
+    if score < -WIN_SCORE + 1000:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score > WIN_SCORE - 1000:
+        return score - ply
+    if score < -WIN_SCORE + 1000:
+        return score + ply
+    return score
+
+def attack_score(game, row, col, player):
+    """player 在 (row, col) 落子的进攻价值"""
+    total_score = 0
+    for direction in range(len(DIRECTIONS)):
+        total_score += LINE_SCORES[line_codes(game, row, col, direction, player)[0]]
+    return total_score
+
+def evaluate_position(game):
+    """静态评估：以当前行棋方视角，比较双方最佳落点的进攻价值"""
+    player = game.current_player
+    opponent = opponent_of(player)
+    own_best = opponent_best = 0
+    for row, col in generate_moves(game):
+        own_best = max(own_best, attack_score(game, row, col, player))
+        opponent_best = max(opponent_best, attack_score(game, row, col, opponent))
+    return own_best - opponent_best * 4 // 5
+
+class AlphaBetaSearch:
+    """带迭代加深和时间预算的 negamax alpha-beta 搜索"""
+    def __init__(self, game, time_limit=AI_TIME_LIMIT, max_depth=MAX_DEPTH, tt=None, stop_event=None,
+                 move_ordering=True, max_nodes=None):
+        self.game = game
+        self.stop_event = stop_event
+        self.tt = tt if tt is not None else get_transposition_table()
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes  # 节点预算，用完时和超时一样返回最后一个完整迭代的结果
+        self.move_ordering = move_ordering
+        self.deadline = None
+        self.nodes = 0
+        self.eval_calls = 0
+        self.depth_reached = 0
+        # 每层最多两个杀手着法，历史表按引起截断的次数和深度累加
+        self.killers = [[] for _ in range(max_depth + 1)]
+        self.history = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        # 统计：展开过子节点的内部节点数、beta 截断次数、第一个着法就截断的次数、每次迭代的节点数
+        self.interior_nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.iteration_nodes = {}
+        # 耗时统计（秒）：走法生成与排序、叶子评估、终局与必胜判断
+        self.movegen_time = 0.0
+        self.eval_time = 0.0
+        self.win_check_time = 0.0
+        self.tt_hits = self.tt.hits
+        self.tt_misses = self.tt.misses
+
+    def best_move(self):
+        """逐层加深，超时则返回最后一个完整迭代的最佳着法"""
+        clock = time.perf_counter()
+        moves = ordered_moves(self.game)
+        self.movegen_time += time.perf_counter() - clock
+        if not moves:
+            return None
+        results = self.iterate(moves)
+        return results[max(results)][0] if results else moves[0]
+
+    def iterate(self, moves):
+        """对给定的根着法逐层加深，返回 {深度: (最佳着法, 分值)}，只包含完整搜完的深度"""
+        self.deadline = time.perf_counter() + self.time_limit
+        self.tt.new_search()
+        moves = list(moves)
+        results = {}
+        for depth in range(1, self.max_depth + 1):
+            nodes_before = self.nodes
+            try:
+                best, score = self.search_root(moves, depth)
+            except SearchTimeout:
+                break
+            self.iteration_nodes[depth] = self.nodes - nodes_before
+            results[depth] = (best, score)
+            self.depth_reached = depth
+            if abs(score) >= WIN_SCORE - self.max_depth:
+                break
+            # 下一次迭代先搜索本轮的最佳着法
+            moves.remove(best)
+            moves.insert(0, best)
+        return results
+
+    def search_root(self, moves, depth):
+        game = self.game
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best = moves[0]
+        for move in moves:
+            game.make_move(*move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                game.unmake_move()
+            if score > alpha:
+                alpha = score
+                best = move
+        return best, alpha
+
+    def order_moves(self, ply, hash_move):
+        """置换表着法、战术威胁、杀手着法依次优先，其余按 evaluate_move 和历史表的得分从高到低
+
+        候选为评分最高的 BRANCH_LIMIT 个加上仍然合法的杀手着法，排在前 BRANCH_LIMIT 之外的杀手也会被搜索。
+        """
+        game = self.game
+        if not self.move_ordering or forced_moves(game) is not None:
+            return ordered_moves(game, hash_move)
+        scores = dict(scored_moves(game)[:BRANCH_LIMIT])
+        killers = [move for move in self.killers[ply] if move in game.candidates]
+        for move in killers:
+            scores.setdefault(move, 0)
+        if hash_move and hash_move not in scores and game.is_valid_move(*hash_move):
+            scores[hash_move] = 0
+        own = game.threats[game.current_player]
+        tactical = own[OPEN_FOUR] | own[FOUR] | game.threats[opponent_of(game.current_player)][OPEN_FOUR]
+        history = self.history
+        return sorted(scores, key=lambda move: (move != hash_move, move not in tactical, move not in killers,
+                                                -scores[move] - history[move[0]][move[1]]))
+
+    def record_cutoff(self, move, depth, ply):
+        """记录引起 beta 截断的着法：更新该层的杀手着法和历史表"""
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+        self.history[move[0]][move[1]] += depth * depth
+
+    def ordering_stats(self):
+        """截断率、首着截断率和有效分支因子（最后两次完整迭代的节点数之比）"""
+        depths = sorted(self.iteration_nodes)
+        branching = None
+        if len(depths) >= 2 and self.iteration_nodes[depths[-2]]:
+            branching = self.iteration_nodes[depths[-1]] / self.iteration_nodes[depths[-2]]
+        return {
+            "nodes": self.nodes,
+            "interior_nodes": self.interior_nodes,
+            "cutoffs": self.cutoffs,
+            "cutoff_rate": self.cutoffs / self.interior_nodes if self.interior_nodes else 0.0,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "branching_factor": branching,
+        }
+
+    def stats(self):
+        """本次搜索的统计：ordering_stats 加上深度、评估次数、置换表命中率和各部分耗时"""
+        hits = self.tt.hits - self.tt_hits
+        probes = hits + self.tt.misses - self.tt_misses
+        stats = self.ordering_stats()
+        stats.update({
+            "depth": self.depth_reached,
+            "eval_calls": self.eval_calls,
+            "tt_hit_rate": hits / probes if probes else 0.0,
+            "movegen_time": self.movegen_time,
+            "eval_time": self.eval_time,
+            "win_check_time": self.win_check_time,
+        })
+        return stats
+
+    def terminal_score(self, ply):
+        """已分胜负、满盘或可以直接判定必胜时返回分值，否则返回 None"""
+        game = self.game
+        if game.winner:
+            # 上一步已经获胜，对当前行棋方而言是负分
+            return -(WIN_SCORE - ply)
+        if game.bitboard.is_full():
+            return 0
+        # 用威胁索引直接判断必胜：己方能成五，或对手无法成五而己方能走出活四
+        own_threats = game.threats[game.current_player]
+        if own_threats[FIVE]:
+            return WIN_SCORE - ply - 1
+        if own_threats[OPEN_FOUR] and not game.threats[opponent_of(game.current_player)][FIVE]:
+            return WIN_SCORE - ply - 3
+        return None
+
+    def negamax(self, depth, alpha, beta, ply):
+        game = self.game
+        self.nodes += 1
+        clock = time.perf_counter()
+        if clock > self.deadline or (self.stop_event and self.stop_event.is_set()):
+            raise SearchTimeout()
+        if self.max_nodes and self.nodes > self.max_nodes:
+            raise SearchTimeout()
+        terminal = self.terminal_score(ply)
+        self.win_check_time += time.perf_counter() - clock
+        if terminal is not None:
+            return terminal
+
+        key = game.hash
+        hash_move = None
+        entry = self.tt.probe(key)
+        if entry:
+            tt_depth, flag, tt_score, hash_move = entry
+            if tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if flag == EXACT:
+                    return tt_score
+                if flag == LOWER and tt_score >= beta:
+                    return tt_score
+                if flag == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        if depth == 0:
+            self.eval_calls += 1
+            clock = time.perf_counter()
+            score = evaluate_position(game)
+            self.eval_time += time.perf_counter() - clock
+            self.tt.store(key, 0, EXACT, score, None)
+            return score
+
+        alpha_orig = alpha
+        best = -WIN_SCORE - 1
+        best_move = None
+        self.interior_nodes += 1
+        clock = time.perf_counter()
+        moves = self.order_moves(ply, hash_move)
+        self.movegen_time += time.perf_counter() - clock
+        for index, move in enumerate(moves):
+            game.make_move(*move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                if index == 0:
+                    self.first_move_cutoffs += 1
+                self.record_cutoff(move, depth, ply)
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, score_to_tt(best, ply), best_move)
+        return best
+
 def evaluate_move(game, row, col):
-    directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
     total_score = 0
     
-    for dx, dy in directions:
-        line = get_line(game, row, col, dx, dy, game.current_player)
-        total_score += score_line(line)
+    for direction in range(len(DIRECTIONS)):
+        own_code, opponent_code = line_codes(game, row, col, direction, game.current_player)
+        total_score += LINE_SCORES[own_code]
         
         # 评估阻止对手的价值
-        opponent_line = get_line(game, row, col, dx, dy, 'White' if game.current_player == 'Black' else 'Black')
-        total_score += score_line(opponent_line) * 0.8  # 给予稍低的权重
+        total_score += LINE_SCORES[opponent_code] * 0.8  # 给予稍低的权重
     
     return total_score
 
@@ -93,4 +587,57 @@ def score_window(window):
         return 100     # 活二
     elif 1 == sum(window) and window.count(0) == 4:
         return 10      # 活一
-    return 0
\ No newline at end of file
+    return 0
+
+def build_line_scores():
+    """预先计算所有 3^9 种线段编码的 score_line 分值"""
+    digit_values = (0, 1, -1)
+    scores = []
+    for code in range(3 ** LINE_LENGTH):
+        line = []
+        for _ in range(LINE_LENGTH):
+            code, digit = divmod(code, 3)
+            line.append(digit_values[digit])
+        line.reverse()
+        scores.append(score_line(line))
+    return scores
+
+LINE_SCORES = build_line_scores()
+
+def evaluate_board(game):
+    """用 NumPy 一次算出每个空位的 evaluate_move 分值，返回 (BOARD_SIZE, BOARD_SIZE) 数组
+
+    已有棋子的格子为 -inf。编码方式与 line_codes 相同，四个方向各用 9 个平移切片累加。
+    """
+    player = game.current_player
+    half = LINE_LENGTH // 2
+    stones = np.array([[0 if cell is None else 1 if cell == player else 2 for cell in row]
+                       for row in game.board], dtype=np.int8)
+    # 棋盘外的格子对双方都记为 2
+    own = np.full((BOARD_SIZE + 2 * half, BOARD_SIZE + 2 * half), 2, dtype=np.int8)
+    opponent = own.copy()
+    own[half:half + BOARD_SIZE, half:half + BOARD_SIZE] = stones
+    opponent[half:half + BOARD_SIZE, half:half + BOARD_SIZE] = (3 - stones) % 3
+
+    table = _line_score_array()
+    total_score = np.zeros((BOARD_SIZE, BOARD_SIZE))
+    for dx, dy in DIRECTIONS:
+        own_code = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+        opponent_code = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+        for i in range(-half, half + 1):
+            r, c = half + i * dx, half + i * dy
+            own_code = own_code * 3 + own[r:r + BOARD_SIZE, c:c + BOARD_SIZE]
+            opponent_code = opponent_code * 3 + opponent[r:r + BOARD_SIZE, c:c + BOARD_SIZE]
+        # 与 evaluate_move 保持相同的累加顺序，保证浮点结果完全一致
+        total_score += table[own_code]
+        total_score += table[opponent_code] * 0.8
+    total_score[stones != 0] = -np.inf
+    return total_score
+
+_line_score_table = None
+
+def _line_score_array():
+    global _line_score_table
+    if _line_score_table is None:
+        _line_score_table = np.array(LINE_SCORES, dtype=np.float64)
+    return _line_score_table
@@ -0,0 +1,136 @@
+"""AI 基准与回归测试：在固定局面上记录速度和着法是否正确，输出 JSON
+
+    python ai_benchmark.py --seed 0 --depth 3 --output results.json
+    python ai_benchmark.py --baseline results.json
+
+固定深度、固定种子且不查开局库，同一份代码的节点数和着法每次都相同；
+给出 --baseline 时，着法从正确变成错误、或节点速度下降超过阈值的局面会被列为回归，并以非零状态退出。
+"""
+import argparse
+import json
+import sys
+import time
+import ai
+from common import Game
+
+# (名称, 类别, 落子序列, 正确着法集合；None 表示只测速度)
+POSITIONS = [
+    ("empty", "opening", [], {(7, 7)}),
+    ("second-move", "opening", [(7, 7)], None),
+    ("diagonal-opening", "opening", [(7, 7), (6, 8), (8, 8)], None),
+    ("midgame-1", "midgame",
+     [(7, 7), (6, 6), (7, 8), (7, 6), (8, 6), (6, 8), (5, 7), (8, 7), (6, 7), (9, 8), (4, 7), (3, 7)], None),
+    ("midgame-2", "midgame",
+     [(7, 7), (8, 8), (6, 8), (8, 6), (8, 7), (6, 6), (9, 6), (7, 5), (5, 9), (4, 10), (6, 7), (5, 7)], None),
+    ("midgame-3", "midgame",
+     [(7, 7), (7, 8), (6, 7), (8, 7), (5, 7), (4, 7), (6, 6), (6, 8), (5, 8), (8, 5), (8, 9), (9, 10),
+      (5, 6), (5, 5)], None),
+    ("win-open-four", "must-win",
+     [(7, 3), (8, 3), (7, 4), (8, 4), (7, 5), (8, 5), (7, 6), (0, 14)], {(7, 2), (7, 7)}),
+    ("win-broken-four", "must-win",
+     [(4, 4), (0, 0), (5, 5), (0, 2), (7, 7), (0, 4), (8, 8), (14, 14)], {(6, 6)}),
+    ("block-four", "must-block",
+     [(2, 2), (3, 3), (10, 0), (4, 4), (12, 4), (5, 5), (0, 14), (6, 6)], {(7, 7)}),
+    ("block-open-three", "must-block",
+     [(0, 0), (7, 5), (0, 14), (7, 6), (14, 0), (7, 7)], {(7, 4), (7, 8), (7, 3), (7, 9)}),
+    ("vcf-double-four", "must-win",
+     [(7, 7), (0, 0), (7, 8), (0, 2), (7, 9), (0, 4), (8, 10), (0, 6), (9, 10), (0, 8), (10, 10), (0, 10)],
+     {(7, 6), (7, 10), (11, 10)}),
+]
+
+def build_game(moves):
+    game = Game()
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+def run_position(name, category, moves, expected, depth, time_limit, engine):
+    game = build_game(moves)
+    start = time.perf_counter()
+    move = ai.choose_move(game, time_limit=time_limit, use_book=False, engine=engine, max_depth=depth)
+    elapsed = time.perf_counter() - start
+    # last_stats 对所有着法来源都有记录（MCTS 为模拟次数，必胜搜索为 VCF/VCT 节点数），last_search 只在单进程搜索时存在
+    stats = ai.last_stats
+    nodes = stats["nodes"]
+    return {
+        "name": name,
+        "category": category,
+        "move": list(move) if move else None,
+        "correct": None if expected is None else tuple(move) in expected,
+        "source": stats["source"],
+        "time": elapsed,
+        "win_check_time": stats["win_check_time"],
+        "nodes": nodes,
+        "nodes_per_second": nodes / elapsed if elapsed > 0 else 0.0,
+        "eval_calls": stats.get("eval_calls", 0),
+        "depth": stats["depth"],
+    }
+
+def run_suite(seed=0, depth=3, time_limit=60.0, engine="alphabeta"):
+    ai.set_seed(seed)
+    # 每次都从空置换表开始，避免前一个局面的结果影响节点数
+    results = []
+    for name, category, moves, expected in POSITIONS:
+        ai.get_transposition_table().clear()
+        results.append(run_position(name, category, moves, expected, depth, time_limit, engine))
+    graded = [result for result in results if result["correct"] is not None]
+    total_time = sum(result["time"] for result in results)
+    total_nodes = sum(result["nodes"] for result in results)
+    return {
+        "seed": seed,
+        "depth": depth,
+        "engine": engine,
+        "positions": results,
+        "summary": {
+            "correct": sum(result["correct"] for result in graded),
+            "graded": len(graded),
+            "total_time": total_time,
+            "total_nodes": total_nodes,
+            "nodes_per_second": total_nodes / total_time if total_time > 0 else 0.0,
+            "eval_calls": sum(result["eval_calls"] for result in results),
+        },
+    }
+
+def find_regressions(report, baseline, slowdown=0.2):
+    """与基准结果比较：着法不再正确，或节点速度下降超过 slowdown"""
+    previous = {result["name"]: result for result in baseline["positions"]}
+    regressions = []
+    for result in report["positions"]:
+        old = previous.get(result["name"])
+        if not old:
+            continue
+        if old["correct"] and not result["correct"]:
+            regressions.append(f"{result['name']}: 着法 {result['move']} 不再正确")
+        if old["nodes_per_second"] and result["nodes_per_second"] < old["nodes_per_second"] * (1 - slowdown):
+            regressions.append(f"{result['name']}: 节点速度 {old['nodes_per_second']:.0f} -> "
+                               f"{result['nodes_per_second']:.0f}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 固定局面基准测试")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=60.0)
+    parser.add_argument("--engine", default="alphabeta")
+    parser.add_argument("--output", help="把结果写入 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.seed, args.depth, args.time_limit, args.engine)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(report, json.load(f))
+        for regression in regressions:
+            print(f"回归: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
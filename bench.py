@@ -0,0 +1,358 @@
+"""性能基准测试，运行: python bench.py [名称 ...]"""
+import random
+import sys
+import time
+from common import Game, BOARD_SIZE
+
+def random_game(moves, seed=0):
+    """按固定种子随机落子，生成一个未分胜负的局面"""
+    rng = random.Random(seed)
+    game = Game()
+    cells = [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)]
+    rng.shuffle(cells)
+    for row, col in cells:
+        if len(game.move_history) >= moves:
+            break
+        game.update_board(row, col)
+        if game.winner:
+            return random_game(moves, seed + 1)
+    return game
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
+
+def scan_check_winner(game, row, col, player):
+    """原来的逐格扫描五连检测，作为对照"""
+    for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        count = 1
+        for sign in (1, -1):
+            for i in range(1, 5):
+                r, c = row + sign * i * dx, col + sign * i * dy
+                if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE and game.board[r][c] == player:
+                    count += 1
+                else:
+                    break
+        if count >= 5:
+            return True
+    return False
+
+def bench_check_winner(repeat=200):
+    """对所有空位做一次“落子能否获胜”检测：逐格扫描 vs 位棋盘"""
+    game = random_game(60)
+    player = game.current_player
+    empty = [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE) if game.is_valid_move(r, c)]
+
+    def scan():
+        for row, col in empty:
+            scan_check_winner(game, row, col, player)
+
+    def bits():
+        for row, col in empty:
+            game.bitboard.would_win(row, col, player)
+
+    scan_time = timed(scan, repeat)
+    bits_time = timed(bits, repeat)
+    print(f"check_winner: 扫描 {scan_time:.3f}s, 位棋盘 {bits_time:.3f}s, 加速 {scan_time / bits_time:.1f}x")
+
+def bench_tt(time_limit=2.0, sizes=(1, 4, 16)):
+    """不同容量的置换表在同一局面下的命中与覆盖情况"""
+    from ai import AlphaBetaSearch
+    from transposition import TranspositionTable
+    for size_mb in sizes:
+        game = random_game(20, 3)
+        search = AlphaBetaSearch(game, time_limit, tt=TranspositionTable(size_mb))
+        search.best_move()
+        print(f"tt {size_mb}MB: 深度 {search.depth_reached}, 节点 {search.nodes}, {search.tt.stats()}")
+
+def list_evaluate_move(game, row, col):
+    """原来基于 get_line/score_line 的 evaluate_move，作为对照"""
+    from ai import DIRECTIONS, get_line, score_line, opponent_of
+    total_score = 0
+    for dx, dy in DIRECTIONS:
+        total_score += score_line(get_line(game, row, col, dx, dy, game.current_player))
+        total_score += score_line(get_line(game, row, col, dx, dy, opponent_of(game.current_player))) * 0.8
+    return total_score
+
+def bench_patterns(repeat=20):
+    """线段查表 vs 列表切片打分，并核对两者分值完全一致"""
+    from ai import evaluate_move
+    games = [random_game(moves, seed) for seed, moves in enumerate((10, 40, 80, 120))]
+    cells = [(game, r, c) for game in games
+             for r in range(BOARD_SIZE) for c in range(BOARD_SIZE) if game.is_valid_move(r, c)]
+    for game, row, col in cells:
+        assert evaluate_move(game, row, col) == list_evaluate_move(game, row, col), (row, col)
+
+    list_time = timed(lambda: [list_evaluate_move(*cell) for cell in cells], repeat)
+    table_time = timed(lambda: [evaluate_move(*cell) for cell in cells], repeat)
+    print(f"patterns: 分值一致 ({len(cells)} 格), 列表 {list_time:.3f}s, 查表 {table_time:.3f}s, "
+          f"加速 {list_time / table_time:.1f}x")
+
+def bench_batch_eval(repeat=200):
+    """NumPy 整盘评估 vs 逐格 evaluate_move，核对分值一致并比较每秒评估格数"""
+    from ai import evaluate_move, evaluate_board, np
+    if np is None:
+        print("batch_eval: 未安装 NumPy，跳过")
+        return
+    games = [random_game(moves, seed) for seed, moves in enumerate((10, 40, 80, 120))]
+    for game in games:
+        scores = evaluate_board(game)
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                if game.is_valid_move(r, c):
+                    assert scores[r, c] == evaluate_move(game, r, c), (r, c)
+    cells = sum(1 for game in games for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)
+                if game.is_valid_move(r, c))
+
+    def scalar():
+        for game in games:
+            for r in range(BOARD_SIZE):
+                for c in range(BOARD_SIZE):
+                    if game.is_valid_move(r, c):
+                        evaluate_move(game, r, c)
+
+    def batch():
+        for game in games:
+            evaluate_board(game)
+
+    scalar_time = timed(scalar, repeat)
+    batch_time = timed(batch, repeat)
+    print(f"batch_eval: 分值一致, 逐格 {cells * repeat / scalar_time:,.0f} 格/秒, "
+          f"NumPy {cells * repeat / batch_time:,.0f} 格/秒")
+
+def bench_parallel(depth=3, workers_list=(1, 2, 4, 8)):
+    """根节点并行搜索在固定深度下的耗时和加速比"""
+    from parallel_search import parallel_search, get_executor, shutdown_pool
+    game = random_game(20, 3)
+    base = None
+    for workers in workers_list:
+        # 先启动进程池并预热，计时只包含搜索本身
+        executor = get_executor(workers)
+        list(executor.map(abs, range(workers)))
+        start = time.perf_counter()
+        move, reached, nodes = parallel_search(game, time_limit=3600, workers=workers, max_depth=depth)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(f"parallel {workers} 进程: 深度 {reached}, 着法 {move}, 节点 {nodes}, "
+              f"{elapsed:.2f}s, 加速 {base / elapsed:.2f}x")
+    shutdown_pool()
+
+def bench_mcts(playouts=2000):
+    """MCTS 每秒模拟次数，以及第二步复用搜索树时保留下来的访问次数"""
+    from mcts import MCTSEngine
+    game = random_game(20, 3)
+    engine = MCTSEngine(seed=0)
+    start = time.perf_counter()
+    move = engine.best_move(game, playouts=playouts)
+    elapsed = time.perf_counter() - start
+    print(f"mcts: {engine.playouts} 次模拟, {engine.playouts / elapsed:,.0f} 次/秒, 着法 {move}")
+    game.make_move(*move)
+    node = next(child for child in engine.root.children if child.move == move)
+    reply = max(node.children, key=lambda child: child.visits)
+    reused = reply.visits
+    game.make_move(*reply.move)
+    engine.best_move(game, playouts=playouts)
+    print(f"mcts: 复用搜索树，新根节点已有 {reused} 次访问")
+
+def position_suite():
+    """固定的测试局面：不同步数的随机局面"""
+    return [random_game(moves, seed) for seed, moves in enumerate((12, 20, 30, 40, 60))]
+
+def bench_ordering(depth=3):
+    """固定深度下，只按 evaluate_move 排序与加上杀手/历史启发排序的节点数对比"""
+    from ai import AlphaBetaSearch
+    from transposition import TranspositionTable
+    for move_ordering in (False, True):
+        totals = {"nodes": 0, "interior_nodes": 0, "cutoffs": 0}
+        first_cutoffs = 0
+        branching = []
+        start = time.perf_counter()
+        for game in position_suite():
+            search = AlphaBetaSearch(game, time_limit=3600, max_depth=depth, tt=TranspositionTable(4),
+                                     move_ordering=move_ordering)
+            search.best_move()
+            stats = search.ordering_stats()
+            for name in totals:
+                totals[name] += stats[name]
+            first_cutoffs += search.first_move_cutoffs
+            if stats["branching_factor"]:
+                branching.append(stats["branching_factor"])
+        elapsed = time.perf_counter() - start
+        label = "杀手/历史" if move_ordering else "仅评分"
+        print(f"ordering {label}: 节点 {totals['nodes']}, "
+              f"截断率 {totals['cutoffs'] / max(1, totals['interior_nodes']):.2f}, "
+              f"首着截断 {first_cutoffs / max(1, totals['cutoffs']):.2f}, "
+              f"分支因子 {sum(branching) / max(1, len(branching)):.2f}, {elapsed:.2f}s")
+
+async def _bench_player(port, room, moves, started, ready):
+    """模拟一名玩家：加入房间、协商二进制协议，等所有房间到齐后轮流下完 moves"""
+    import asyncio
+    import protocol
+    from framing import FrameBuffer, encode_frame
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    frames = FrameBuffer()
+    inbox = []
+
+    async def receive():
+        while not inbox:
+            inbox.extend(protocol.decode(frame)[0] for frame in frames.feed(await reader.read(4096)))
+        return inbox.pop(0)
+
+    writer.write(encode_frame(protocol.encode_json({"type": "join", "room": room})))
+    color = (await receive())["color"]
+    writer.write(encode_frame(protocol.encode_json({"type": "protocol", "binary_version": 1})))
+    while (await receive()).get("type") != "start_game":
+        pass
+    ready()
+    await started.wait()
+    seq = 0
+    for i, move in enumerate(moves):
+        if (i % 2 == 0) == (color == 'Black'):
+            payload, seq = protocol.encode_message({"move": list(move)}, 1, seq)
+            writer.write(encode_frame(payload))
+        else:
+            await receive()
+    writer.close()
+
+def bench_server(rooms=1000, plies=20):
+    """多房间服务器：rooms 个房间同时在本机回环上对弈，统计加入和转发着法的速度"""
+    import asyncio
+    from game_server import GameServer
+
+    moves = [(row, col) for row in range(0, BOARD_SIZE, 2) for col in range(BOARD_SIZE)
+             if (row // 2 + col) % 2 == 0][:plies]
+
+    async def run():
+        server = GameServer()
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0, backlog=4096)
+        port = listener.sockets[0].getsockname()[1]
+        started = asyncio.Event()
+        waiting = [2 * rooms]
+
+        def ready():
+            waiting[0] -= 1
+            if not waiting[0]:
+                timings.append(time.perf_counter())
+                started.set()
+
+        timings = [time.perf_counter()]
+        await asyncio.gather(*(_bench_player(port, f"room-{i}", moves, started, ready)
+                               for i in range(rooms) for _ in range(2)))
+        timings.append(time.perf_counter())
+        listener.close()
+        return server.moves_relayed, timings
+
+    relayed, (start, joined, end) = asyncio.run(run())
+    print(f"server {rooms} 房间: 加入 {joined - start:.2f}s, 转发 {relayed} 步 {end - joined:.2f}s, "
+          f"{relayed / (end - joined):.0f} 步/秒")
+
+async def _bench_spectator(port, room, plies, joined, done):
+    """模拟一名观众：收到快照后通知 joined，再计数增量着法，收满 plies 步后通知 done"""
+    import asyncio
+    import protocol
+    from framing import FrameBuffer, encode_frame
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    frames = FrameBuffer()
+    writer.write(encode_frame(protocol.encode_json({"type": "spectate", "room": room})))
+    writer.write(encode_frame(protocol.encode_json({"type": "protocol", "binary_version": 1})))
+    moves = 0
+    registered = False
+    while moves < plies:
+        data = await reader.read(4096)
+        if not data:
+            break
+        for frame in frames.feed(data):
+            message = protocol.decode(frame)[0]
+            if not registered and message.get("type") == "snapshot":
+                # 收到快照说明服务器已经登记了这名观众
+                registered = True
+                joined()
+            moves += "move" in message
+    done()
+    writer.close()
+
+def bench_spectators(spectators=1000, plies=40):
+    """观众广播：一个房间 spectators 名观众，统计每步广播的耗时和所有观众收齐着法的时间"""
+    import asyncio
+    import game_server
+
+    moves = [(row, col) for row in range(0, BOARD_SIZE, 2) for col in range(BOARD_SIZE)
+             if (row // 2 + col) % 2 == 0][:plies]
+    fanout = []
+    broadcast_move = game_server.Room.broadcast_move
+
+    def timed_broadcast(room, move):
+        start = time.perf_counter()
+        dropped = broadcast_move(room, move)
+        fanout.append(time.perf_counter() - start)
+        return dropped
+
+    async def run():
+        server = game_server.GameServer()
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0, backlog=4096)
+        port = listener.sockets[0].getsockname()[1]
+        started = asyncio.Event()
+        players_ready = asyncio.Event()
+        spectators_ready = asyncio.Event()
+        counts = {"players": 2, "spectators": spectators, "done": spectators}
+        finished = asyncio.Event()
+
+        def player_ready():
+            counts["players"] -= 1
+            if not counts["players"]:
+                players_ready.set()
+
+        def spectator_joined():
+            counts["spectators"] -= 1
+            if not counts["spectators"]:
+                spectators_ready.set()
+
+        def spectator_done():
+            counts["done"] -= 1
+            if not counts["done"]:
+                finished.set()
+
+        players = [asyncio.ensure_future(_bench_player(port, "room", moves, started, player_ready))
+                   for _ in range(2)]
+        await players_ready.wait()
+        watchers = [asyncio.ensure_future(_bench_spectator(port, "room", plies, spectator_joined, spectator_done))
+                    for _ in range(spectators)]
+        await spectators_ready.wait()
+        # 所有观众都收到快照后先开始计时，再放行两名玩家
+        start = time.perf_counter()
+        started.set()
+        await asyncio.gather(*players)
+        played = time.perf_counter() - start
+        await finished.wait()
+        delivered = time.perf_counter() - start
+        await asyncio.gather(*watchers)
+        listener.close()
+        return played, delivered, server.spectators_dropped
+
+    game_server.Room.broadcast_move = timed_broadcast
+    try:
+        played, delivered, dropped = asyncio.run(run())
+    finally:
+        game_server.Room.broadcast_move = broadcast_move
+    average = sum(fanout) / len(fanout)
+    print(f"spectators {spectators} 名观众 {plies} 步: 每步广播 {average * 1000:.2f}ms "
+          f"({average / spectators * 1e6:.2f}us/观众), 对局 {played:.2f}s, 全部送达 {delivered:.2f}s, 断开 {dropped}")
+
+BENCHMARKS = {
+    "check_winner": bench_check_winner,
+    "tt": bench_tt,
+    "patterns": bench_patterns,
+    "batch_eval": bench_batch_eval,
+    "parallel": bench_parallel,
+    "mcts": bench_mcts,
+    "ordering": bench_ordering,
+    "server": bench_server,
+    "spectators": bench_spectators,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
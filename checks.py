@@ -0,0 +1,127 @@
+"""快速自检，运行: python checks.py [名称 ...]
+
+不依赖 pygame 和网络，几秒内跑完；检查失败时抛出 AssertionError。
+"""
+import random
+import sys
+from common import Game, BOARD_SIZE, CANDIDATE_RANGE, DIRECTIONS, LINE_THREATS, THREAT_LEVELS
+from common import ZOBRIST, ZOBRIST_SIDE, line_codes
+from framing import FrameBuffer, FrameError, HEADER, MAX_FRAME_SIZE, encode_frame
+import protocol
+
+def check_framing():
+    """同一串字节无论怎样拆分或合并送入 FrameBuffer，都还原出相同的消息"""
+    rng = random.Random(0)
+    payloads = [b"", b"{}", bytes(range(256)), b"x" * MAX_FRAME_SIZE]
+    payloads += [bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 300))) for _ in range(50)]
+    stream = b"".join(encode_frame(payload) for payload in payloads)
+
+    # 一次送入全部数据（多条消息合并在一个 recv 里）
+    assert FrameBuffer().feed(stream) == payloads
+    # 逐字节送入（每条消息和长度前缀都被拆开）
+    frames = FrameBuffer()
+    assert [frame for i in range(len(stream)) for frame in frames.feed(stream[i:i + 1])] == payloads
+    # 随机长度的分段
+    for _ in range(20):
+        frames = FrameBuffer()
+        received = []
+        offset = 0
+        while offset < len(stream):
+            size = rng.randint(1, 2 * HEADER.size + 400)
+            received += frames.feed(stream[offset:offset + size])
+            offset += size
+        assert received == payloads
+        assert not frames.buffer
+
+    try:
+        FrameBuffer().feed(HEADER.pack(MAX_FRAME_SIZE + 1))
+    except FrameError:
+        pass
+    else:
+        raise AssertionError("超长的长度前缀没有被拒绝")
+
+def _recompute(game):
+    """不用增量数据，从棋盘重新算出哈希、候选和威胁索引"""
+    board = game.board
+    stones = [(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE) if board[row][col]]
+    hash_value = ZOBRIST_SIDE if len(stones) % 2 else 0
+    for row, col in stones:
+        hash_value ^= ZOBRIST[board[row][col]][row][col]
+    empty = [(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE) if board[row][col] is None]
+    candidates = {(row, col) for row, col in empty
+                  if any(abs(row - r) <= CANDIDATE_RANGE and abs(col - c) <= CANDIDATE_RANGE for r, c in stones)}
+    threats = {}
+    for player in ('Black', 'White'):
+        threats[player] = {level: set() for level in THREAT_LEVELS}
+        for row, col in empty:
+            for direction in range(len(DIRECTIONS)):
+                level = LINE_THREATS[line_codes(game, row, col, direction, player)[0]]
+                if level:
+                    threats[player][level].add((row, col))
+    return hash_value, candidates, threats
+
+def _assert_consistent(game):
+    hash_value, candidates, threats = _recompute(game)
+    assert game.hash == hash_value, "哈希与重新计算的不一致"
+    assert game.candidates == candidates, "候选集合与重新计算的不一致"
+    assert game.threats == threats, "威胁索引与重新计算的不一致"
+
+def check_make_unmake(games=20):
+    """随机落子和撤销，每一步后增量维护的哈希、候选和威胁都与重新计算的结果相同"""
+    rng = random.Random(1)
+    for _ in range(games):
+        game = Game()
+        cells = [(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)]
+        rng.shuffle(cells)
+        # 偏向中心落子，棋型更密集，能覆盖到冲四、活四和成五
+        cells.sort(key=lambda cell: abs(cell[0] - 7) + abs(cell[1] - 7) + rng.random() * 6)
+        for cell in cells[:rng.randint(10, 60)]:
+            game.make_move(*cell)
+            _assert_consistent(game)
+            if game.winner:
+                break
+            if rng.random() < 0.3:
+                # 撤销一步再重新走回，顺带检查撤销后的状态
+                undone = game.unmake_move()
+                _assert_consistent(game)
+                game.make_move(*undone)
+        while game.move_history:
+            game.unmake_move()
+            assert game.winner is None
+            _assert_consistent(game)
+        assert game.hash == 0 and game.current_player == 'Black'
+
+def check_protocol():
+    """encode_message 的结果经 decode 还原成原消息，二进制消息带回发送时的序号"""
+    messages = [{"move": [row, col]} for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)]
+    messages += [{"type": name} for name in protocol.CONTROL_TYPES]
+    messages += [
+        {"type": "join", "room": "房间 1"},
+        {"type": "protocol", "binary_version": protocol.BINARY_VERSION},
+        {"type": "snapshot", "moves": [[7, 7], [7, 8]], "players": 2, "binary_version": 1},
+        {"type": "error", "message": "invalid move", "move": [3, 4]},
+        {"type": "connection_established", "color": "Black", "binary_version": 1},
+    ]
+    for binary_version in (0, protocol.BINARY_VERSION):
+        seq = 0xFFF0  # 从接近上限处开始，覆盖 16 位序号回绕
+        for message in messages:
+            payload, next_seq = protocol.encode_message(message, binary_version, seq)
+            decoded, decoded_seq = protocol.decode(payload)
+            assert decoded == message, (message, decoded)
+            if decoded_seq is None:
+                assert next_seq == seq, "JSON 消息不应占用序号"
+            else:
+                assert binary_version and decoded_seq == seq and next_seq == (seq + 1) & 0xFFFF
+            seq = next_seq
+
+CHECKS = {
+    "framing": check_framing,
+    "make_unmake": check_make_unmake,
+    "protocol": check_protocol,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(CHECKS)
+    for name in names:
+        CHECKS[name]()
+        print(f"{name}: ok")
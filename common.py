@@ -1,65 +1,295 @@
+import random
+
 # 定义一些基本参数
 GRID_SIZE = 40
 BOARD_SIZE = 15
 MARGIN = GRID_SIZE  # 添加边距
 SCREEN_SIZE = GRID_SIZE * (BOARD_SIZE + 1)  # 增加屏幕大小，为边距留出空间
 
-class Game:
+# 位棋盘参数：每行多留一位空列作为哨兵，横向和斜向移位时不会跨行相连
+BIT_STRIDE = BOARD_SIZE + 1
+BIT_SHIFTS = (1, BIT_STRIDE, BIT_STRIDE + 1, BIT_STRIDE - 1)
+FULL_MASK = sum(1 << (row * BIT_STRIDE + col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE))
+
+def bit_index(row, col):
+    """坐标在位棋盘中的位置"""
+    return row * BIT_STRIDE + col
+
+def has_five(bits):
+    """用移位与运算检查位棋盘中是否存在五连"""
+    for shift in BIT_SHIFTS:
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> 2 * shift) & (bits >> 4 * shift):
+            return True
+    return False
+
+class BitBoard:
+    """每种颜色用一个大整数记录棋子位置"""
     def __init__(self):
+        self.bits = {'Black': 0, 'White': 0}
+
+    def place(self, row, col, player):
+        self.bits[player] |= 1 << bit_index(row, col)
+
+    def remove(self, row, col, player):
+        self.bits[player] &= ~(1 << bit_index(row, col))
+
+    def occupied(self):
+        return self.bits['Black'] | self.bits['White']
+
+    def is_full(self):
+        return self.occupied() == FULL_MASK
+
+    def has_five(self, player):
+        return has_five(self.bits[player])
+
+    def would_win(self, row, col, player):
+        """在 (row, col) 落子后 player 是否五连，不修改棋盘"""
+        return has_five(self.bits[player] | (1 << bit_index(row, col)))
+
+# Zobrist 哈希表：每个格子每种颜色一个 64 位随机数，固定种子保证各进程一致
+_zobrist_rng = random.Random(20240101)
+ZOBRIST = {
+    player: [[_zobrist_rng.getrandbits(64) for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    for player in ('Black', 'White')
+}
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)  # 轮到白棋时异或
+
+# 候选着法范围：每个格子周围两格以内（不含自身）的格子
+CANDIDATE_RANGE = 2
+NEIGHBOURS = [
+    [[(r, c)
+      for r in range(max(0, row - CANDIDATE_RANGE), min(BOARD_SIZE, row + CANDIDATE_RANGE + 1))
+      for c in range(max(0, col - CANDIDATE_RANGE), min(BOARD_SIZE, col + CANDIDATE_RANGE + 1))
+      if (r, c) != (row, col)]
+     for col in range(BOARD_SIZE)]
+    for row in range(BOARD_SIZE)
+]
+
+# 以某格为中心、沿一个方向向两侧各延伸 4 格的线段
+LINE_LENGTH = 9
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+def build_line_cells():
+    """每个格子在四个方向上 get_line 所覆盖的坐标，棋盘外记为 None"""
+    half = LINE_LENGTH // 2
+    cells = []
+    for row in range(BOARD_SIZE):
+        row_cells = []
+        for col in range(BOARD_SIZE):
+            directions = []
+            for dx, dy in DIRECTIONS:
+                line = []
+                for i in range(-half, half + 1):
+                    r, c = row + i * dx, col + i * dy
+                    line.append((r, c) if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE else None)
+                directions.append(tuple(line))
+            row_cells.append(directions)
+        cells.append(row_cells)
+    return cells
+
+LINE_CELLS = build_line_cells()
+
+def line_codes(game, row, col, direction, player):
+    """把 get_line 的 9 格线段编码成三进制整数，同时返回己方和对手视角的编码
+
+    每格的数字：0 为空位，1 为己方棋子，2 为对方棋子或棋盘外，第一格为最高位。
+    """
+    board = game.board
+    own_code = opponent_code = 0
+    for cell in LINE_CELLS[row][col][direction]:
+        own_code *= 3
+        opponent_code *= 3
+        if cell is None:
+            own_code += 2
+            opponent_code += 2
+        else:
+            stone = board[cell[0]][cell[1]]
+            if stone is None:
+                continue
+            if stone == player:
+                own_code += 1
+                opponent_code += 2
+            else:
+                own_code += 2
+                opponent_code += 1
+    return own_code, opponent_code
+
+# 威胁等级：在空位落子后，该方向上形成的棋型
+OPEN_THREE, FOUR, OPEN_FOUR, FIVE = 1, 2, 3, 4
+THREAT_LEVELS = (FIVE, OPEN_FOUR, FOUR, OPEN_THREE)
+
+def _five_completions(line):
+    """线段中再落一子就能连成五子的空位（线段里每个五格窗口都经过中心）"""
+    cells = set()
+    for start in range(LINE_LENGTH - 4):
+        window = line[start:start + 5]
+        if window.count(1) == 4 and 0 in window:
+            cells.add(start + window.index(0))
+    return cells
+
+def classify_line(line):
+    """在线段中心落下己方棋子后形成的威胁等级，line 的每格为 0/1/2（空/己方/对方或棋盘外）"""
+    line = list(line)
+    line[LINE_LENGTH // 2] = 1
+    for start in range(LINE_LENGTH - 4):
+        if line[start:start + 5].count(1) == 5:
+            return FIVE
+    completions = _five_completions(line)
+    if len(completions) >= 2:
+        return OPEN_FOUR
+    if completions:
+        return FOUR
+    # 再补一子就能成活四，即为活三
+    for i in range(LINE_LENGTH):
+        if line[i] == 0:
+            line[i] = 1
+            if len(_five_completions(line)) >= 2:
+                return OPEN_THREE
+            line[i] = 0
+    return 0
+
+def build_line_threats():
+    """预先计算所有中心为空的线段编码对应的威胁等级"""
+    threats = []
+    for code in range(3 ** LINE_LENGTH):
+        line = []
+        for _ in range(LINE_LENGTH):
+            code, digit = divmod(code, 3)
+            line.append(digit)
+        line.reverse()
+        threats.append(classify_line(line) if line[LINE_LENGTH // 2] == 0 else 0)
+    return threats
+
+LINE_THREATS = build_line_threats()
+
+def opponent_of(player):
+    return 'White' if player == 'Black' else 'Black'
+
+class Game:
+    def __init__(self, analysis=True):
+        """analysis 为 False 时不维护候选集合和威胁索引，只能用于判定胜负（例如服务器端校验着法），不能交给 AI"""
+        self.analysis = analysis
         self.board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         self.current_player = 'Black'
         self.winner = None
         self.player_color = None
         self.move_history = []
+        self.bitboard = BitBoard()
+        self.hash = 0
+        self.neighbour_count = self.candidates = self.threat_levels = self.threats = None
+        if analysis:
+            self._init_analysis()
+
+    def _init_analysis(self):
+        # 每个格子附近的棋子数，以及附近有棋子的空位集合
+        self.neighbour_count = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.candidates = set()
+        # 威胁索引：每个空位在四个方向上的威胁等级，以及按等级归类的空位集合
+        self.threat_levels = {
+            player: [[[0] * len(DIRECTIONS) for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+            for player in ('Black', 'White')
+        }
+        self.threats = {player: {level: set() for level in THREAT_LEVELS} for player in ('Black', 'White')}
 
     def update_board(self, row, col):
         """更新棋盘状态"""
-        if self.board[row][col] is None:
-            self.board[row][col] = self.current_player
-            self.move_history.append((row, col))
-            if self.check_winner(row, col):
-                self.winner = self.current_player
-            self.switch_player()
-            return True
-        return False
+        return self.make_move(row, col)
+
+    def make_move(self, row, col):
+        """落子，并增量维护胜者、行棋方和哈希"""
+        if self.board[row][col] is not None:
+            return False
+        player = self.current_player
+        self.board[row][col] = player
+        self.bitboard.place(row, col, player)
+        self.move_history.append((row, col))
+        self.hash ^= ZOBRIST[player][row][col] ^ ZOBRIST_SIDE
+        if self.analysis:
+            self.candidates.discard((row, col))
+            for r, c in NEIGHBOURS[row][col]:
+                self.neighbour_count[r][c] += 1
+                if self.board[r][c] is None:
+                    self.candidates.add((r, c))
+            self._refresh_threats(row, col)
+        if self.check_winner(row, col):
+            self.winner = player
+        self.switch_player()
+        return True
+
+    def unmake_move(self):
+        """撤销最后一步，返回被撤销的坐标"""
+        if not self.move_history:
+            return None
+        row, col = self.move_history.pop()
+        player = self.board[row][col]
+        self.board[row][col] = None
+        self.bitboard.remove(row, col, player)
+        self.hash ^= ZOBRIST[player][row][col] ^ ZOBRIST_SIDE
+        if self.analysis:
+            for r, c in NEIGHBOURS[row][col]:
+                self.neighbour_count[r][c] -= 1
+                if self.neighbour_count[r][c] == 0:
+                    self.candidates.discard((r, c))
+            if self.neighbour_count[row][col]:
+                self.candidates.add((row, col))
+            self._refresh_threats(row, col)
+        # 只有最后一步才可能决出胜负，撤销后一定没有胜者
+        self.winner = None
+        self.current_player = player
+        return row, col
+
+    def _refresh_threats(self, row, col):
+        """(row, col) 的棋子变化后，只重新计算经过它的四条线段上空位的威胁"""
+        if self.board[row][col] is not None:
+            for player in ('Black', 'White'):
+                levels = self.threat_levels[player][row][col]
+                for level in levels:
+                    if level:
+                        self.threats[player][level].discard((row, col))
+                levels[:] = [0] * len(DIRECTIONS)
+        for direction in range(len(DIRECTIONS)):
+            for cell in LINE_CELLS[row][col][direction]:
+                if cell is not None and self.board[cell[0]][cell[1]] is None:
+                    self._update_threat(cell[0], cell[1], direction)
+
+    def _update_threat(self, row, col, direction):
+        black_code, white_code = line_codes(self, row, col, direction, 'Black')
+        for player, code in (('Black', black_code), ('White', white_code)):
+            levels = self.threat_levels[player][row][col]
+            old, new = levels[direction], LINE_THREATS[code]
+            if old == new:
+                continue
+            levels[direction] = new
+            if old and old not in levels:
+                self.threats[player][old].discard((row, col))
+            if new:
+                self.threats[player][new].add((row, col))
+
+    def copy(self):
+        """按落子顺序重放得到一个独立的副本，哈希、候选和威胁索引都重新建立"""
+        game = Game(self.analysis)
+        for row, col in self.move_history:
+            game.make_move(row, col)
+        game.player_color = self.player_color
+        return game
 
     def switch_player(self):
         """切换当前玩家"""
-        self.current_player = 'White' if self.current_player == 'Black' else 'Black'
+        self.current_player = opponent_of(self.current_player)
 
     def check_winner(self, row, col):
-        """检查是否有胜利者"""
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for dx, dy in directions:
-            count = 1
-            for i in range(1, 5):
-                r, c = row + i * dx, col + i * dy
-                if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE and self.board[r][c] == self.current_player:
-                    count += 1
-                else:
-                    break
-            for i in range(1, 5):
-                r, c = row - i * dx, col - i * dy
-                if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE and self.board[r][c] == self.current_player:
-                    count += 1
-                else:
-                    break
-            if count >= 5:
-                return True
-        return False
+        """检查 (row, col) 处棋子的颜色是否已形成五连"""
+        player = self.board[row][col] or self.current_player
+        return self.bitboard.has_five(player)
 
     def is_over(self):
         """判断游戏是否结束"""
         if self.winner is not None:
             return True
         
-        # 查是否还有空位
-        for row in self.board:
-            if None in row:
-                return False
-        
         # 如果没有空位且没有胜者，则为平局
-        return True
+        return self.bitboard.is_full()
 
     def get_winner(self):
         """返回获胜玩家"""
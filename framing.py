@@ -0,0 +1,43 @@
+"""TCP 消息分帧：每条消息前加 4 字节大端长度，接收端用流式缓冲区重组
+
+TCP 只保证字节顺序，一次 recv 可能收到半条消息，也可能收到好几条，
+所以接收端必须按长度前缀切分，不能假设一次 recv 对应一条消息。
+"""
+import struct
+
+HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 64 * 1024  # 单条消息的长度上限，超过视为协议错误
+
+class FrameError(ValueError):
+    """收到的长度前缀不合法"""
+
+def encode_frame(payload):
+    """给一条消息加上长度前缀"""
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FrameError(f"消息过长: {len(payload)} 字节")
+    return HEADER.pack(len(payload)) + payload
+
+class FrameBuffer:
+    """流式重组缓冲区：不断 feed 收到的字节，取出其中所有完整的消息"""
+    def __init__(self, max_frame=MAX_FRAME_SIZE):
+        self.max_frame = max_frame
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """追加收到的数据，返回已经完整的消息列表；不完整的部分留到下次"""
+        buffer = self.buffer
+        buffer += data
+        frames = []
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            (length,) = HEADER.unpack_from(buffer, offset)
+            if length > self.max_frame:
+                raise FrameError(f"消息过长: {length} 字节")
+            end = offset + HEADER.size + length
+            if len(buffer) < end:
+                break
+            frames.append(bytes(buffer[offset + HEADER.size:end]))
+            offset = end
+        if offset:
+            del buffer[:offset]
+        return frames
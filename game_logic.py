@@ -1,32 +1,163 @@
 from common import Game, SCREEN_SIZE, GRID_SIZE, BOARD_SIZE, MARGIN
 from ui import main_menu, game_mode_selection, network_mode_selection, show_winner_popup, draw_stones, show_available_rooms, waiting_room, draw_game_screen, choose_first_player
 from network import start_network_game
-from ai import ai_move
+from ai import choose_move, profiled_choose_move, ordered_moves, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY
+import itertools
+import threading
+import time
 import pygame
 
 WHITE = (255, 255, 255)
+AI_MOVE_EVENT = pygame.USEREVENT + 1
+NETWORK_EVENT = pygame.USEREVENT + 2  # 网络接收线程收到消息后投递，主循环再从队列中取出
+AI_MIN_DELAY = 0.5  # AI 至少等待半秒再落子，让玩家能看到自己的移动
+AI_PONDER = True    # 玩家思考时让 AI 在后台预先计算
+PONDER_CANDIDATES = 3  # 预先计算玩家最可能的几步应手
+_ai_request_ids = itertools.count(1)
+
+class AIWorker:
+    """在后台线程里计算 AI 着法，结果通过 AI_MOVE_EVENT 送回主循环；options 为难度对应的 choose_move 参数"""
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.request_id = None
+        self.stop_event = None
+        self.thread = None
+
+    def is_thinking(self):
+        return self.request_id is not None
+
+    def start(self, game, delay=AI_MIN_DELAY, move=None):
+        """开始计算；已知着法（例如后台预算命中）时只等待 delay 后送回"""
+        self.cancel()
+        self.request_id = next(_ai_request_ids)
+        self.stop_event = threading.Event()
+        # 在副本上搜索，主循环绘制的棋盘不会被搜索中的试探落子干扰
+        self.thread = threading.Thread(target=self._run,
+                                       args=(game.copy(), self.request_id, self.stop_event, delay, move),
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self, game, request_id, stop_event, delay, move):
+        start = time.perf_counter()
+        try:
+            if move is None:
+                move = profiled_choose_move(game, stop_event=stop_event, **self.options)
+            remaining = delay - (time.perf_counter() - start)
+            if remaining > 0:
+                stop_event.wait(remaining)
+        except Exception as e:
+            print(f"AI search failed: {e!r}")
+            move = None
+        finally:
+            # 出错时也要送回结果（move 为 None），否则 is_thinking 一直为真，玩家无法再落子
+            if not stop_event.is_set():
+                pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, request_id=request_id, move=move))
+
+    def take_result(self, event):
+        """事件属于当前请求时返回着法，过期或已取消的结果返回 None"""
+        if event.request_id != self.request_id:
+            return None
+        self.request_id = None
+        return event.move
+
+    def cancel(self):
+        """停止后台计算并等待线程退出，避免它和下一次搜索同时使用置换表、证明缓存和 MCTS 搜索树"""
+        if self.stop_event:
+            self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.request_id = None
+
+class Ponderer:
+    """AI 落子后，趁玩家思考时预先计算对玩家最可能应手的回应"""
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.thread = None
+        self.stop_event = None
+        self.position = None  # 开始预算时的局面哈希
+        self.results = {}     # 玩家着法 -> (AI 回应, 计算耗时)
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    def start(self, game):
+        self.cancel()
+        self.position = game.hash
+        self.results = {}
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(game.copy(), self.stop_event, self.results),
+                                       daemon=True)
+        self.thread.start()
+
+    def _run(self, game, stop_event, results):
+        for reply in ordered_moves(game)[:PONDER_CANDIDATES]:
+            if stop_event.is_set():
+                return
+            game.make_move(*reply)
+            start = time.perf_counter()
+            move = None
+            if not game.is_over():
+                # 预算的结果不一定被采用，不覆盖 last_stats，也不写入统计日志
+                move = choose_move(game, stop_event=stop_event, record=False, **self.options)
+            game.unmake_move()
+            # 被打断的搜索结果不完整，不能使用
+            if move and not stop_event.is_set():
+                results[reply] = (move, time.perf_counter() - start)
+
+    def take(self, game, move):
+        """玩家即将在 game 上走 move：停止预算，命中时返回预先算好的回应"""
+        self.cancel()
+        if self.position is None:
+            return None
+        cached = self.results.get(move) if self.position == game.hash else None
+        self.position = None
+        if cached:
+            self.hits += 1
+            self.time_saved += cached[1]
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def cancel(self):
+        """停止后台计算并等待线程退出，避免和下一次搜索同时使用置换表"""
+        if self.stop_event:
+            self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "time_saved": self.time_saved,
+        }
+
 def start_game_ui():
     """启动游戏 UI，包括主菜单和模式选择"""
     game_mode = main_menu()
     if game_mode == "local":
-        mode = game_mode_selection()
+        mode, difficulty = game_mode_selection()
         if mode == "AI":
             first_player = choose_first_player()
-            return mode, None, None, first_player
-        return mode, None, None, None
+            return mode, None, None, first_player, difficulty
+        return mode, None, None, None, None
     elif game_mode == "network":
         network_mode, port = network_mode_selection()  # 获取 port
         if network_mode == "back":
             return start_game_ui()
         if network_mode == "server":
-            return "Player", network_mode, port, None  # 使用已获取的 port
+            return "Player", network_mode, port, None, None  # 使用已获取的 port
         else:
             host, port = show_available_rooms()
-            return "Player", "client", (host, port), None
+            return "Player", "client", (host, port), None, None
     else:
-        return None, None, None, None
+        return None, None, None, None, None
 
-def play_game(game, mode, network_mode=None, port=None, first_player=None):
+def play_game(game, mode, network_mode=None, port=None, first_player=None, difficulty=DEFAULT_DIFFICULTY):
     """实际的游戏循环"""
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE))
@@ -41,22 +172,21 @@ def play_game(game, mode, network_mode=None, port=None, first_player=None):
         if not network or network == "main_menu":
             return "main_menu"
         
-        # 停止所有现有线程
-        network.stop_receive_thread()
-        
+        # 收到消息时唤醒主循环；等待房间里已经收到的消息也要处理，所以先投递一次
+        network.on_message = lambda: pygame.event.post(pygame.event.Event(NETWORK_EVENT))
+        network.start_receive_thread()
+        pygame.event.post(pygame.event.Event(NETWORK_EVENT))
 
-        network.start_server_receive_thread()
-
-        
         game.player_color = 'Black' if network_mode == "server" else 'White'
 
     clock = pygame.time.Clock()
+    options = DIFFICULTY_LEVELS[difficulty]
+    ai_worker = AIWorker(options)
+    ponderer = Ponderer(options) if mode == "AI" and AI_PONDER else None
 
-    # 如果是AI模式且AI先手，则先进行AI移动
+    # 如果是AI模式且AI先手，则先让AI在后台思考
     if mode == "AI" and first_player == "AI":
-        ai_move(game)
-        draw_game_screen(screen, game, network_mode is not None)  # 立即绘制AI的移动，并播放音效
-        pygame.time.wait(500)  # 等待半秒，让玩家能看到AI的移动
+        ai_worker.start(game, delay=0)
 
     try:
         while True:
@@ -70,21 +200,25 @@ def play_game(game, mode, network_mode=None, port=None, first_player=None):
                     network.close()
                 return action
 
-            if network_mode:
-                move_data = network.check_network_data()
-                if move_data:
-                    if isinstance(move_data, list) and len(move_data) == 2:
-                        row, col = move_data
-                        if game.is_valid_move(row, col):
-                            game.update_board(row, col)
-                            print(f"Updated board with move: {row}, {col}")
-                        else:
-                            print(f"Received invalid move: {move_data}")
-                    else:
-                        print(f"Received invalid move data format: {move_data}")
-
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+                if event.type == NETWORK_EVENT and network:
+                    for move_data in network.pending_messages():
+                        if isinstance(move_data, list) and len(move_data) == 2:
+                            row, col = move_data
+                            if game.is_valid_move(row, col):
+                                game.update_board(row, col)
+                                play_sound = True
+                            else:
+                                print(f"Received invalid move: {move_data}")
+                        else:
+                            print(f"Received unexpected network data: {move_data}")
+                elif event.type == AI_MOVE_EVENT:
+                    move = ai_worker.take_result(event)
+                    if move and game.update_board(*move):
+                        play_sound = True
+                        if ponderer and not game.is_over():
+                            ponderer.start(game)
+                elif event.type == pygame.QUIT:
                     if network:
                         network.close()
                     return "quit"
@@ -99,20 +233,19 @@ def play_game(game, mode, network_mode=None, port=None, first_player=None):
                     if network_mode and game.current_player != game.player_color:
                         print("Not your turn", game.current_player, game.player_color)
                         continue
+                    if ai_worker.is_thinking():
+                        continue
                     col = round((x - MARGIN) / GRID_SIZE)
                     row = round((y - MARGIN) / GRID_SIZE)
                     
                     if game.is_valid_move(row, col):
+                        pondered_move = ponderer.take(game, (row, col)) if ponderer else None
                         if game.update_board(row, col):
                             play_sound = True
                             if network_mode:
                                 network.send_move(row, col)
                             elif mode == "AI" and not game.is_over():
-                                main_menu_button = draw_game_screen(screen, game, network_mode is not None)
-                                pygame.display.flip()
-                                pygame.time.wait(500)  # 等待半秒，让玩家能看到自己的移动
-                                ai_move(game)
-                                play_sound = True
+                                ai_worker.start(game, move=pondered_move)
 
             # 重新绘制游戏屏幕，并播放音效（如果需要）
             main_menu_button = draw_game_screen(screen, game, network_mode is not None)
@@ -120,6 +253,10 @@ def play_game(game, mode, network_mode=None, port=None, first_player=None):
             clock.tick(30)  # 限制帧率为30FPS
 
     finally:
+        ai_worker.cancel()
+        if ponderer:
+            ponderer.cancel()
+            print(f"Ponder stats: {ponderer.stats()}")
         if network:
             print("Closing network connection")
             network.close()
@@ -128,12 +265,12 @@ def game_loop():
     """游戏主循环"""
     while True:
         game = Game()
-        mode, network_mode, port, first_player = start_game_ui()
+        mode, network_mode, port, first_player, difficulty = start_game_ui()
         if mode is None:
             break
         
         while True:
-            action = play_game(game, mode, network_mode, port)
+            action = play_game(game, mode, network_mode, port, first_player, difficulty or DEFAULT_DIFFICULTY)
             if action == "quit":
                 return
             elif action == "main_menu":
@@ -0,0 +1,286 @@
+"""无界面的多房间对局服务器：一个进程用 asyncio 承载大量房间，不依赖 pygame
+
+    python game_server.py --host 0.0.0.0 --port 12346
+    python main.py server --port 12346
+
+客户端连上后先发 {"type": "join", "room": 名称}，房间不存在时自动创建。先进入的执黑，后进入的执白；
+服务器回复带颜色和二进制协议版本的 connection_established，双方到齐后向两人发送 start_game。
+每个房间在服务器端保存一个 Game，着法先用 is_valid_move 和行棋方检查，合法才落子并转发给对手。
+消息的分帧和编码与 network.Network 相同（framing、protocol），也支持 list_rooms 查询房间列表。
+目前图形界面的联机模式仍是点对点直连，不会发送 join，还没有连接本服务器的客户端。
+
+观众发送 {"type": "spectate", "room": 名称} 只读观战：先收到一条包含 move_history 的 snapshot，之后只收到每步的着法。
+着法对所有观众只编码一次（二进制消息的序号为步数），直接写入各自的发送缓冲区，不等待观众读取；
+缓冲区积压的观众暂停接收增量，追上后补发一次新的快照，长时间追不上就断开，因此慢观众不会拖慢对局。
+"""
+import argparse
+import asyncio
+import struct
+import protocol
+from common import Game, opponent_of
+from framing import FrameBuffer, FrameError, encode_frame
+
+SERVER_PORT = 12346
+MAX_ROOMS = 10000       # 房间数上限
+RECV_SIZE = 4096
+WRITE_BUFFER_LIMIT = 64 * 1024  # 写缓冲区超过这个大小时等待对端读取
+SPECTATOR_BUFFER_LIMIT = 16 * 1024  # 观众的发送缓冲区超过这个大小就暂停发送增量
+SPECTATOR_MAX_LAG = 50  # 暂停后又过了这么多步仍未追上的观众被断开
+
+class Connection:
+    """一个玩家连接：分帧读取，按协商的协议编码发送"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.frames = FrameBuffer()
+        self.binary_version = 0
+        self.send_seq = 0
+        self.room = None
+        self.color = None
+        self.spectating = False
+        self.lag = 0  # 观众因缓冲区积压而跳过的步数
+
+    def send(self, message):
+        """编码并写入发送缓冲区，不等待发送完成"""
+        payload, self.send_seq = protocol.encode_message(message, self.binary_version, self.send_seq)
+        self.writer.write(encode_frame(payload))
+
+    def write_frame(self, frame):
+        """写入已经编码好的帧，用于向多个观众发送同一条消息"""
+        self.writer.write(frame)
+
+    def buffered(self):
+        return self.writer.transport.get_write_buffer_size()
+
+    async def drain(self):
+        if self.writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            await self.writer.drain()
+
+    async def receive(self):
+        """等待下一批完整消息；连接断开时返回 None"""
+        while True:
+            data = await self.reader.read(RECV_SIZE)
+            if not data:
+                return None
+            frames = self.frames.feed(data)
+            if frames:
+                return [protocol.decode(frame)[0] for frame in frames]
+
+    def close(self):
+        self.writer.close()
+
+class Room:
+    """一局棋：服务器端的 Game 和两名玩家"""
+    def __init__(self, name):
+        self.name = name
+        self.game = Game(analysis=False)  # 只用于校验着法和判定胜负
+        self.players = {}  # 颜色 -> Connection
+        self.spectators = set()
+
+    def join(self, connection):
+        """加入房间，返回分配的颜色；房间已满时返回 None"""
+        for color in ('Black', 'White'):
+            if color not in self.players:
+                self.players[color] = connection
+                connection.room = self
+                connection.color = color
+                return color
+        return None
+
+    def leave(self, connection):
+        if connection.spectating:
+            self.spectators.discard(connection)
+        elif self.players.get(connection.color) is connection:
+            del self.players[connection.color]
+        connection.room = None
+        connection.color = None
+        connection.spectating = False
+        connection.lag = 0
+
+    def snapshot(self):
+        return {"type": "snapshot", "moves": [list(move) for move in self.game.move_history],
+                "players": len(self.players), "binary_version": protocol.BINARY_VERSION}
+
+    def add_spectator(self, connection):
+        connection.room = self
+        connection.spectating = True
+        self.spectators.add(connection)
+        connection.send(self.snapshot())
+
+    def broadcast_move(self, move):
+        """把刚走的一步发给所有观众，每种编码只生成一次帧；返回被断开的观众数"""
+        ply = len(self.game.move_history)
+        message = {"move": move}
+        frames = {}
+        dropped = 0
+        for spectator in list(self.spectators):
+            if spectator.lag:
+                dropped += self.catch_up(spectator)
+                continue
+            if spectator.buffered() > SPECTATOR_BUFFER_LIMIT:
+                spectator.lag = 1
+                continue
+            version = spectator.binary_version
+            frame = frames.get(version)
+            if frame is None:
+                payload = protocol.encode_binary(message, ply) if version else protocol.encode_json(message)
+                frame = frames[version] = encode_frame(payload)
+            spectator.write_frame(frame)
+        return dropped
+
+    def catch_up(self, spectator):
+        """积压的观众：缓冲区降下来后用一条快照代替跳过的所有增量，落后太多则断开"""
+        if spectator.buffered() <= SPECTATOR_BUFFER_LIMIT // 2:
+            spectator.lag = 0
+            spectator.send(self.snapshot())
+            return 0
+        spectator.lag += 1
+        if spectator.lag > SPECTATOR_MAX_LAG:
+            self.leave(spectator)
+            spectator.close()
+            return 1
+        return 0
+
+    def is_full(self):
+        return len(self.players) == 2
+
+    def play(self, connection, move):
+        """校验并执行一步棋，返回错误说明；合法时返回 None"""
+        game = self.game
+        if not self.is_full():
+            return "game not started"
+        if game.is_over():
+            return "game is over"
+        if connection.color != game.current_player:
+            return "not your turn"
+        if not (isinstance(move, list) and len(move) == 2 and all(type(value) is int for value in move)):
+            return "invalid move format"
+        if not game.is_valid_move(*move):
+            return "invalid move"
+        game.make_move(*move)
+        return None
+
+class GameServer:
+    def __init__(self, max_rooms=MAX_ROOMS):
+        self.max_rooms = max_rooms
+        self.rooms = {}
+        self.moves_relayed = 0
+        self.spectators_dropped = 0
+
+    def room_list(self):
+        return [{"room": name, "players": len(room.players), "spectators": len(room.spectators)}
+                for name, room in self.rooms.items()]
+
+    def join(self, connection, name):
+        room = self.rooms.get(name)
+        if room is None:
+            if len(self.rooms) >= self.max_rooms:
+                connection.send({"type": "error", "message": "too many rooms"})
+                return
+            room = self.rooms[name] = Room(name)
+        color = room.join(connection)
+        if color is None:
+            connection.send({"type": "error", "message": "room is full"})
+            return
+        connection.send({"type": "connection_established", "color": color,
+                         "binary_version": protocol.BINARY_VERSION})
+        if room.is_full():
+            for player in room.players.values():
+                player.send({"type": "start_game"})
+
+    def spectate(self, connection, name):
+        room = self.rooms.get(name)
+        if room is None:
+            connection.send({"type": "error", "message": "no such room"})
+            return
+        room.add_spectator(connection)
+
+    def leave(self, connection):
+        room = connection.room
+        if room is None:
+            return
+        spectating = connection.spectating
+        room.leave(connection)
+        if spectating:
+            return
+        for player in room.players.values():
+            player.send({"type": "opponent_left"})
+        if not room.players:
+            # 房间关闭后观众连接没有用处，通知后直接断开
+            for spectator in list(room.spectators):
+                spectator.send({"type": "room_closed"})
+                room.leave(spectator)
+                spectator.close()
+            del self.rooms[room.name]
+
+    def handle_message(self, connection, message):
+        """处理一条客户端消息，返回需要等待写缓冲区的连接"""
+        if not isinstance(message, dict):
+            connection.send({"type": "error", "message": "invalid message"})
+            return ()
+        room = connection.room
+        kind = message.get("type")
+        if kind == "join" and room is None:
+            self.join(connection, str(message.get("room", "")))
+        elif kind == "spectate" and room is None:
+            self.spectate(connection, str(message.get("room", "")))
+        elif kind == "list_rooms":
+            connection.send({"type": "rooms", "rooms": self.room_list()})
+        elif kind == "protocol":
+            version = protocol.negotiate_version(message.get("binary_version", 0))
+            if version is None:
+                connection.send({"type": "error", "message": "invalid binary_version"})
+            else:
+                connection.binary_version = version
+        elif "move" in message and room is not None:
+            error = room.play(connection, message["move"])
+            if error:
+                connection.send({"type": "error", "message": error, "move": message["move"]})
+                return (connection,)
+            opponent = room.players[opponent_of(connection.color)]
+            opponent.send({"move": message["move"]})
+            self.moves_relayed += 1
+            if room.spectators:
+                self.spectators_dropped += room.broadcast_move(message["move"])
+            return (opponent,)
+        else:
+            connection.send({"type": "error", "message": "unexpected message"})
+        return (connection,)
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            while True:
+                messages = await connection.receive()
+                if messages is None:
+                    break
+                pending = set()
+                for message in messages:
+                    pending.update(self.handle_message(connection, message))
+                for target in pending:
+                    await target.drain()
+        except (ConnectionError, FrameError, ValueError, struct.error) as e:
+            print(f"Closing connection: {e}")
+        finally:
+            self.leave(connection)
+            connection.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Game server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多房间五子棋对局服务器")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-rooms", type=int, default=MAX_ROOMS)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(GameServer(args.max_rooms).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
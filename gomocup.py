@@ -0,0 +1,167 @@
+"""Gomocup（Piskvork）协议引擎：通过标准输入输出和对局管理器通信，不依赖 pygame
+
+    python gomocup.py
+    python main.py gomocup
+
+支持 START、RESTART、BEGIN、TURN、BOARD、TAKEBACK、INFO、ABOUT 和 END。
+协议坐标为 "x,y"（x 为列，y 为行）。每步的思考时间由 INFO timeout_turn 和 time_left 决定，
+置换表和证明缓存的大小由 INFO max_memory 决定。
+标准输出只用于协议回复，AI 和开局库的其他输出被转到标准错误。
+"""
+import sys
+import threading
+import ai
+from common import Game, BOARD_SIZE
+
+ENGINE_NAME = "Gomoku"
+ENGINE_VERSION = "1.0"
+MOVES_TO_GO = 25            # 只给出整局剩余时间时，假设还要走的步数
+TIME_MARGIN = 0.1           # 每步预留给进程通信和输出的时间（秒）
+MIN_THINK_TIME = 0.05       # 每步最少的思考时间（秒）
+MEMORY_RESERVED_MB = 32     # 解释器、代码和预先计算的表格占用的内存估计（MB）
+
+class GomocupEngine:
+    """协议状态：当前局面和管理器通过 INFO 给出的限制"""
+    def __init__(self, output):
+        self.output = output
+        self.game = None
+        self.timeout_turn = None  # 每步时间上限（毫秒），0 表示尽快落子
+        self.time_left = None     # 整局剩余时间（毫秒）
+        self.max_memory = 0       # 内存上限（字节），0 表示不限制
+
+    def send(self, text):
+        self.output.write(text + "\n")
+        self.output.flush()
+
+    def send_move(self, move):
+        row, col = move
+        self.send(f"{col},{row}")
+
+    def think_time(self):
+        """根据每步和整局的剩余时间算出本步的思考时间（秒）"""
+        budget = ai.AI_TIME_LIMIT
+        if self.timeout_turn is not None:
+            budget = self.timeout_turn / 1000
+        if self.time_left is not None:
+            budget = min(budget, self.time_left / 1000 / MOVES_TO_GO)
+        return max(MIN_THINK_TIME, budget - TIME_MARGIN)
+
+    def set_info(self, key, value):
+        if key == "timeout_turn":
+            self.timeout_turn = int(value)
+        elif key == "time_left":
+            self.time_left = int(value)
+        elif key == "max_memory":
+            self.max_memory = int(value)
+            if self.max_memory:
+                ai.set_memory_limit(max(1, self.max_memory / (1024 * 1024) - MEMORY_RESERVED_MB))
+
+    def play(self):
+        """计算并输出一步；到达思考时间时通过 stop_event 打断所有搜索"""
+        game = self.game
+        limit = self.think_time()
+        stop_event = threading.Event()
+        timer = threading.Timer(limit, stop_event.set)
+        timer.start()
+        try:
+            move = ai.choose_move(game, time_limit=limit, stop_event=stop_event)
+        finally:
+            timer.cancel()
+        if move is None or not game.is_valid_move(*move):
+            move = next((row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
+                        if game.board[row][col] is None)
+        game.make_move(*move)
+        self.send_move(move)
+
+    def parse_move(self, text):
+        col, row = (int(value) for value in text.split(",")[:2])
+        return row, col
+
+    def load_board(self, lines):
+        """按 BOARD 给出的棋子重建局面：1 为己方，2 为对方，双方交替落子，下一步由己方走"""
+        own = []
+        opponent = []
+        for line in lines:
+            x, y, field = (int(value) for value in line.split(","))
+            if field == 1:
+                own.append((y, x))
+            elif field == 2:
+                opponent.append((y, x))
+        # 对方多一子时对方执黑先走
+        first, second = (opponent, own) if len(opponent) > len(own) else (own, opponent)
+        self.game = Game()
+        for i in range(max(len(first), len(second))):
+            for stones in (first, second):
+                if i < len(stones):
+                    self.game.make_move(*stones[i])
+
+    def handle(self, line, lines):
+        """处理一条命令，返回 False 表示结束"""
+        parts = line.split(" ", 1)
+        command = parts[0].upper()
+        argument = parts[1].strip() if len(parts) > 1 else ""
+        if command == "START":
+            if int(argument) != BOARD_SIZE:
+                self.send(f"ERROR only {BOARD_SIZE}x{BOARD_SIZE} boards are supported")
+            else:
+                self.game = Game()
+                self.send("OK")
+        elif command == "RESTART":
+            self.game = Game()
+            self.send("OK")
+        elif command == "INFO":
+            key, _, value = argument.partition(" ")
+            self.set_info(key, value)
+        elif command == "ABOUT":
+            self.send(f'name="{ENGINE_NAME}", version="{ENGINE_VERSION}"')
+        elif command == "END":
+            return False
+        elif self.game is None:
+            self.send("ERROR no START command")
+        elif command == "BEGIN":
+            self.play()
+        elif command == "TURN":
+            move = self.parse_move(argument)
+            if not self.game.is_valid_move(*move):
+                self.send(f"ERROR invalid move {argument}")
+            else:
+                self.game.make_move(*move)
+                self.play()
+        elif command == "BOARD":
+            board = []
+            for board_line in lines:
+                board_line = board_line.strip()
+                if board_line.upper() == "DONE":
+                    break
+                board.append(board_line)
+            self.load_board(board)
+            self.play()
+        elif command == "TAKEBACK":
+            move = self.parse_move(argument)
+            if self.game.move_history and self.game.move_history[-1] == move:
+                self.game.unmake_move()
+                self.send("OK")
+            else:
+                self.send(f"ERROR cannot take back {argument}")
+        else:
+            self.send(f"UNKNOWN {command}")
+        return True
+
+def main(input_stream=None, output=None):
+    output = output or sys.stdout
+    # 协议只允许在标准输出上写回复，其他打印一律转到标准错误
+    sys.stdout = sys.stderr
+    engine = GomocupEngine(output)
+    lines = iter(input_stream or sys.stdin)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if not engine.handle(line, lines):
+                break
+        except ValueError:
+            engine.send(f"ERROR cannot parse: {line}")
+
+if __name__ == "__main__":
+    main()
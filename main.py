@@ -1,7 +1,23 @@
+import sys
 from common import Game
-from game_logic import game_loop
 
 def main():
+    # "python main.py tournament ..." 运行无界面的 AI 比赛，不加载 pygame
+    if len(sys.argv) > 1 and sys.argv[1] == "tournament":
+        from tournament import main as tournament_main
+        tournament_main(sys.argv[2:])
+        return
+    # "python main.py gomocup" 以 Gomocup 协议引擎运行，由对局管理器通过标准输入输出控制
+    if len(sys.argv) > 1 and sys.argv[1] == "gomocup":
+        from gomocup import main as gomocup_main
+        gomocup_main()
+        return
+    # "python main.py server ..." 运行无界面的多房间对局服务器
+    if len(sys.argv) > 1 and sys.argv[1] == "server":
+        from game_server import main as server_main
+        server_main(sys.argv[2:])
+        return
+    from game_logic import game_loop
     game_loop()
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+"""蒙特卡洛树搜索（UCT）引擎
+
+树的展开在 Game 上用 make_move/unmake_move 进行，以便利用候选集合和威胁索引；
+随机模拟则只在两个位棋盘整数和一块预先分配的空位缓冲区上进行，不创建 Game，也不分配列表。
+"""
+import math
+import random
+import time
+from common import BOARD_SIZE, BIT_SHIFTS, FIVE, bit_index, opponent_of
+
+MCTS_PLAYOUTS = 3000       # 每步的模拟次数预算
+ROLLOUTS_PER_LEAF = 4      # 每次展开叶子后连续做几次模拟，分摊从根走到叶子的开销
+EXPLORATION = 1.4          # UCT 探索系数
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+CELL_BITS = [1 << bit_index(*divmod(cell, BOARD_SIZE)) for cell in range(CELL_COUNT)]
+
+class Node:
+    """搜索树节点；wins 按走到这个节点的一方统计"""
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, untried):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        best, best_value = None, -1.0
+        for child in self.children:
+            value = child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+def expansion_moves(game):
+    """能成五只走成五，对手能成五只走堵点，否则为所有候选空位"""
+    if game.winner or game.bitboard.is_full():
+        return []
+    if not game.move_history:
+        return [(BOARD_SIZE // 2, BOARD_SIZE // 2)]
+    own = game.threats[game.current_player][FIVE]
+    if own:
+        return [next(iter(own))]
+    blocks = game.threats[opponent_of(game.current_player)][FIVE]
+    if blocks:
+        return list(blocks)
+    return list(game.candidates)
+
+class MCTSEngine:
+    """UCT 搜索，保留上一步的搜索树供下一步复用"""
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_history = None
+        # 随机模拟使用的空位缓冲区，只分配一次
+        self.buffer = list(range(CELL_COUNT))
+        self.playouts = 0
+
+    def best_move(self, game, playouts=MCTS_PLAYOUTS, time_limit=None, stop_event=None):
+        root = self._reuse_root(game)
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.playouts = 0
+        while self.playouts < playouts:
+            if stop_event and stop_event.is_set():
+                break
+            self._iterate(game, root)
+            # 时间在每次迭代后检查，预算为 0 时只做一次迭代
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        if not root.children:
+            moves = expansion_moves(game)
+            return moves[0] if moves else None
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _reuse_root(self, game):
+        """新局面由旧根节点之后的若干步得到时，沿对应子节点往下走，复用已有统计"""
+        history = game.move_history
+        root = None
+        if self.root is not None and history[:len(self.root_history)] == self.root_history:
+            root = self.root
+            for move in history[len(self.root_history):]:
+                root = next((child for child in root.children if child.move == move), None)
+                if root is None:
+                    break
+        if root is None:
+            root = Node(None, None, expansion_moves(game))
+        root.parent = None
+        self.root = root
+        self.root_history = list(history)
+        return root
+
+    def _iterate(self, game, root):
+        node = root
+        depth = 0
+        try:
+            # 选择：沿 UCT 值最大的子节点下行，直到有未展开的着法
+            while not node.untried and node.children:
+                node = node.select_child()
+                game.make_move(*node.move)
+                depth += 1
+            # 展开：随机取一个未尝试的着法
+            if node.untried:
+                index = self.rng.randrange(len(node.untried))
+                move = node.untried[index]
+                node.untried[index] = node.untried[-1]
+                node.untried.pop()
+                game.make_move(*move)
+                depth += 1
+                child = Node(move, node, expansion_moves(game))
+                node.children.append(child)
+                node = child
+            # 模拟：结果以刚走过 node 的一方为准
+            mover = opponent_of(game.current_player)
+            if game.winner:
+                results = [1.0] * ROLLOUTS_PER_LEAF
+            elif game.bitboard.is_full():
+                results = [0.5] * ROLLOUTS_PER_LEAF
+            else:
+                results = [self._rollout(game) for _ in range(ROLLOUTS_PER_LEAF)]
+                results = [0.5 if winner is None else float(winner == mover) for winner in results]
+            self.playouts += ROLLOUTS_PER_LEAF
+        finally:
+            for _ in range(depth):
+                game.unmake_move()
+        # 回传：每上一层视角翻转一次
+        for result in results:
+            walker = node
+            while walker is not None:
+                walker.visits += 1
+                walker.wins += result
+                result = 1.0 - result
+                walker = walker.parent
+
+    def _rollout(self, game):
+        """从当前局面随机下到终局，返回获胜方或 None（和棋）"""
+        bits = game.bitboard.bits
+        black, white = bits['Black'], bits['White']
+        occupied = black | white
+        black_to_move = game.current_player == 'Black'
+        buffer = self.buffer
+        randrange = self.rng.randrange
+        remaining = CELL_COUNT
+        while remaining:
+            i = randrange(remaining)
+            cell = buffer[i]
+            remaining -= 1
+            buffer[i] = buffer[remaining]
+            buffer[remaining] = cell
+            bit = CELL_BITS[cell]
+            if occupied & bit:
+                continue
+            occupied |= bit
+            if black_to_move:
+                black |= bit
+                stones = black
+            else:
+                white |= bit
+                stones = white
+            for shift in BIT_SHIFTS:
+                pairs = stones & (stones >> shift)
+                if pairs & (pairs >> 2 * shift) & (stones >> 4 * shift):
+                    return 'Black' if black_to_move else 'White'
+            black_to_move = not black_to_move
+        return None
+
+_engine = None
+
+def get_mcts_engine():
+    """进程内共享的 MCTS 引擎，使搜索树能在相邻两步之间复用"""
+    global _engine
+    if _engine is None:
+        _engine = MCTSEngine()
+    return _engine
@@ -2,9 +2,16 @@ import socket
 import threading
 import json
 import time
+import queue
 import select
+import selectors
+import struct
+from framing import FrameBuffer, FrameError, encode_frame
+import protocol
 
 BROADCAST_PORT = 12345
+RECV_SIZE = 4096  # 每次 recv 读取的字节数，消息边界由 FrameBuffer 按长度前缀切分
+MESSAGE_QUEUE_SIZE = 256  # 收到但还没被主循环取走的消息上限，满了就暂停读取 socket
 DISCOVERY_MESSAGE = "GOMOKU_GAME_DISCOVERY"
 RESPONSE_MESSAGE = "GOMOKU_GAME_RESPONSE"
 DISCOVERY_RUNNING = False
@@ -62,9 +69,21 @@ class Network:
         self.client = None
         self.server_socket = None
         self.connected = False
-        self.move_lock = threading.Lock()
-        self.network_move = None
         self.running = True
+        # 接收线程把每条消息放入有界队列，并调用 on_message 通知主循环（例如投递一个 pygame 事件）
+        self.messages = queue.Queue(MESSAGE_QUEUE_SIZE)
+        self.on_message = None
+        self.receive_thread = None
+        # 用于唤醒阻塞在 select 上的接收线程：换了 socket 或要停止时写入一个字节
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        # 接收缓冲区，以及等待一次 sendall 发出的已分帧消息
+        self.frames = FrameBuffer()
+        self.send_lock = threading.Lock()
+        self.send_queue = []
+        # 协商出的二进制协议版本（0 表示用 JSON 发送），以及收发的消息序号
+        self.binary_version = 0
+        self.send_seq = 0
+        self.recv_seq = None
         print(f"Using IP address: {get_local_ip()}")
 
     def connect(self):
@@ -78,6 +97,7 @@ class Network:
             self.client.connect(self.addr)
             self.client.settimeout(None)  # 连接后重置为阻塞模式
             self.connected = True
+            self.wake()
             print(f"Successfully connected to {self.host}:{self.port}")
             return True
         except socket.timeout:
@@ -89,119 +109,209 @@ class Network:
         self.client = None
         return False
 
+    def encode(self, data):
+        """协商过二进制协议时用二进制编码，没有对应格式的消息和旧版本对端用 JSON"""
+        payload, self.send_seq = protocol.encode_message(data, self.binary_version, self.send_seq)
+        return payload
+
+    def queue_message(self, data):
+        """把一条消息编码分帧后放入发送队列，调用 flush（或下一次 send）时才真正发出"""
+        with self.send_lock:
+            self.send_queue.append(encode_frame(self.encode(data)))
+
+    def flush(self):
+        """用一次 sendall 发出队列中的所有消息"""
+        with self.send_lock:
+            if not self.send_queue:
+                return
+            payload = b"".join(self.send_queue)
+            self.send_queue.clear()
+            try:
+                self.client.sendall(payload)
+            except (socket.error, AttributeError) as e:
+                print(f"Error sending data: {e}")
+
     def send(self, data):
+        """发出 data，连同之前用 queue_message 排队的消息一起，只用一次 sendall"""
+        self.queue_message(data)
+        self.flush()
+
+    def handshake_message(self):
+        """主机发出的 connection_established，附带本端支持的二进制协议版本"""
+        return {"type": "connection_established", "binary_version": protocol.BINARY_VERSION}
+
+    def negotiate(self, handshake):
+        """客户端收到握手后选择双方都支持的版本并回复；旧版本主机不带版本号，继续用 JSON
+
+        回复只放入发送队列，和客户端的第一步棋一起发出；在此之前主机继续用 JSON 发送，不影响对局。
+        """
+        version = protocol.negotiate_version(handshake.get("binary_version", 0))
+        if version is None:
+            print(f"Invalid binary_version in handshake: {handshake}")
+            version = 0
+        if version:
+            self.queue_message({"type": "protocol", "binary_version": version})
+            self.binary_version = version
+        print(f"Using {'binary v%d' % version if version else 'JSON'} protocol")
+
+    def attach(self, sock):
+        """服务器端接受连接后设置对端 socket，并通知接收线程开始读取"""
+        self.client = sock
+        self.wake()
+
+    def wake(self):
         try:
-            self.client.send(json.dumps(data).encode())
-            print(f"Sent data: {data}")
-        except socket.error as e:
-            print(f"Error sending data: {e}")
+            self.wake_writer.send(b"\0")
+        except OSError:
+            pass
 
     def close(self):
-        self.running = False
+        self.stop_receive_thread()
         if self.client:
             self.client.close()
         if self.server_socket:
             self.server_socket.close()
+        self.wake_reader.close()
+        self.wake_writer.close()
         self.connected = False
         self.client = None
+        self.frames = FrameBuffer()
+        self.binary_version = 0
+        self.send_seq = 0
+        self.recv_seq = None
 
     def send_move(self, row, col):
-        move_data = json.dumps({"move": [row, col]})
-        self.send(move_data)
+        self.send({"move": [row, col]})
 
     def check_network_data(self):
-        with self.move_lock:
-            data = self.network_move
-            self.network_move = None
-        return data
+        """取出下一条收到的消息，没有时返回 None"""
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            return None
 
-    def receive_move_thread(self):
+    def pending_messages(self):
+        """依次取出所有已收到的消息"""
         while True:
+            data = self.check_network_data()
+            if data is None:
+                return
+            yield data
+
+    def deliver(self, data):
+        """放入消息队列；队列满时先通知主循环，再等它取走，消息不会被丢弃"""
+        try:
+            self.messages.put_nowait(data)
+            return
+        except queue.Full:
+            if self.on_message:
+                self.on_message()
+        while self.running:
             try:
-                data = self.client.recv(2048).decode()
-                if not data:
-                    break
-                print(f"Received raw data: {data}")
-                self.handle_received_data(data)
-            except Exception as e:
+                self.messages.put(data, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def receive_available(self):
+        """读取已到达的数据并处理其中所有完整的消息；连接断开时返回 False"""
+        data = self.client.recv(RECV_SIZE)
+        if not data:
+            return False
+        try:
+            frames = self.frames.feed(data)
+        except FrameError as e:
+            print(f"Received invalid frame: {e}")
+            return False
+        for frame in frames:
+            self.handle_received_data(frame)
+        if frames and self.on_message:
+            self.on_message()
+        return True
+
+    def receive_loop(self):
+        """阻塞在 selector 上，数据到达时立即读取；attach、connect 和 stop_receive_thread 通过 wake 唤醒它"""
+        selector = selectors.DefaultSelector()
+        selector.register(self.wake_reader, selectors.EVENT_READ)
+        registered = None
+        try:
+            while self.running:
+                if self.client is not registered:
+                    if registered is not None:
+                        selector.unregister(registered)
+                    registered = self.client
+                    if registered is not None:
+                        selector.register(registered, selectors.EVENT_READ)
+                for key, _ in selector.select():
+                    if key.fileobj is self.wake_reader:
+                        self.wake_reader.recv(RECV_SIZE)
+                    elif self.running and not self.receive_available():
+                        print("Peer disconnected")
+                        return
+        except (OSError, ValueError) as e:
+            if self.running:
                 print(f"Error in receive thread: {e}")
-                break
-        print("Receive thread ended")
+        finally:
+            selector.close()
+            print("Receive thread ended")
+
+    def check_sequence(self, seq):
+        """二进制消息的序号应当连续，不连续说明有消息丢失或重复"""
+        if seq is None:
+            return
+        if self.recv_seq is not None and seq != (self.recv_seq + 1) & 0xFFFF:
+            print(f"Message sequence gap: expected {(self.recv_seq + 1) & 0xFFFF}, got {seq}")
+        self.recv_seq = seq
 
     def handle_received_data(self, data):
+        """处理一条完整消息（一个帧的内容），二进制和 JSON 格式都接受"""
         try:
-            if data.startswith('"') and data.endswith('"'):
-                data = data[1:-1]
-            data = data.replace('\\', '')
-            
-            parsed_data = json.loads(data)
+            parsed_data, seq = protocol.decode(data)
+            self.check_sequence(seq)
             if isinstance(parsed_data, dict):
-                if "type" in parsed_data:
+                if parsed_data.get("type") == "protocol":
+                    # 客户端选定了二进制协议版本，之后本端也用它发送
+                    version = protocol.negotiate_version(parsed_data.get("binary_version", 0))
+                    if version is None:
+                        print(f"Received invalid protocol message: {parsed_data}")
+                    else:
+                        self.binary_version = version
+                elif "type" in parsed_data:
                     # 处理控制消息
                     print(f"Received control message: {parsed_data}")
-                    with self.move_lock:
-                        self.network_move = parsed_data
+                    self.deliver(parsed_data)
                 elif "move" in parsed_data:
                     # 处理移动消息
                     if isinstance(parsed_data["move"], list) and len(parsed_data["move"]) == 2:
-                        with self.move_lock:
-                            self.network_move = parsed_data["move"]
-                        print(f"Processed move: {self.network_move}")
+                        self.deliver(parsed_data["move"])
                     else:
                         print(f"Received invalid move format: {parsed_data}")
                 else:
                     print(f"Received unexpected data format: {parsed_data}")
             else:
                 print(f"Received unexpected data type: {type(parsed_data)}")
-        except json.JSONDecodeError as e:
-            print(f"Received invalid JSON data: {data}")
-            print(f"JSON decode error: {e}")
+        except (ValueError, struct.error) as e:
+            print(f"Received invalid message: {data!r}")
+            print(f"Decode error: {e}")
         except Exception as e:
             print(f"Error handling received data: {e}")
 
-    def start_server_receive_thread(self):
+    def start_receive_thread(self):
+        if self.receive_thread and self.receive_thread.is_alive():
+            return
         self.running = True
-        self.server_receive_thread = threading.Thread(target=self.server_receive_thread_func, daemon=True)
-        self.server_receive_thread.start()
+        self.receive_thread = threading.Thread(target=self.receive_loop, daemon=True)
+        self.receive_thread.start()
 
-    def server_receive_thread_func(self):
-        while self.running:
-            try:
-                if self.client:  # 对于服务器端，这是连接的客户端
-                    ready = select.select([self.client], [], [], 0.1)
-                    if ready[0]:
-                        data = self.client.recv(2048).decode().strip()
-                        if not data:
-                            print("Client disconnected")
-                            break
-                        print(f"Received data: {data}")
-                        self.handle_received_data(data)
-                elif self.connected:  # 对于客户端，我们直接使用self
-                    ready = select.select([self.client], [], [], 0.1)
-                    if ready[0]:
-                        data = self.client.recv(2048).decode().strip()
-                        if not data:
-                            print("Disconnected from server")
-                            break
-                        print(f"Received data: {data}")
-                        self.handle_received_data(data)
-            except Exception as e:
-                print(f"Error in server receive thread: {e}")
-                if not self.running:
-                    break
-        print("Server receive thread ended")
+    # 服务器端和客户端使用同一个接收线程
+    start_server_receive_thread = start_receive_thread
 
     def stop_receive_thread(self):
         self.running = False
-        if hasattr(self, 'receive_thread') and isinstance(self.receive_thread, threading.Thread):
+        self.wake()
+        if self.receive_thread and self.receive_thread is not threading.current_thread():
             self.receive_thread.join(timeout=1)
-        if hasattr(self, 'server_receive_thread') and isinstance(self.server_receive_thread, threading.Thread):
-            self.server_receive_thread.join(timeout=1)
-
-    def start_receive_thread(self):
-        self.running = True
-        self.receive_thread = threading.Thread(target=self.receive_move_thread, daemon=True)
-        self.receive_thread.start()
+        self.receive_thread = None
 
 def start_server(host, port, game_instance):
     global server_socket, DISCOVERY_RUNNING
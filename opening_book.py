@@ -0,0 +1,213 @@
+"""开局库：按 8 种对称归一化后的局面哈希查找开局着法
+
+库文件格式（小端）：16 字节文件头 + 按 key 排序的定长记录
+    文件头: magic(4s) version(H) record_size(H) count(I) 保留(4x)
+    记录:   key(Q) move(H) weight(H)，move 为归一化坐标 row * BOARD_SIZE + col
+同一局面的多条记录相邻存放。查询时用 mmap 映射文件并二分查找，多个进程共享同一份页面。
+
+生成开局库:
+    python opening_book.py selfplay 200 --plies 8 --output opening_book.bin
+    python opening_book.py import games.txt --plies 10 --output opening_book.bin
+导入文件每行一局，着法写成 "row,col" 并用空格分隔。
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+from common import Game, BOARD_SIZE, ZOBRIST, ZOBRIST_SIDE, opponent_of
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+BOOK_MAX_PLIES = 10   # 超过这个步数就不再查开局库
+MAGIC = b"GMKB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI4x")
+RECORD = struct.Struct("<QHH")
+
+def _build_symmetries():
+    """8 种对称变换（4 种旋转及其镜像），每种是格子编号到格子编号的映射"""
+    n = BOARD_SIZE - 1
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - r, c),
+        lambda r, c: (n - c, n - r),
+    ]
+    forward = []
+    inverse = []
+    for transform in transforms:
+        mapping = [0] * (BOARD_SIZE * BOARD_SIZE)
+        back = [0] * (BOARD_SIZE * BOARD_SIZE)
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                tr, tc = transform(r, c)
+                mapping[r * BOARD_SIZE + c] = tr * BOARD_SIZE + tc
+                back[tr * BOARD_SIZE + tc] = r * BOARD_SIZE + c
+        forward.append(mapping)
+        inverse.append(back)
+    return forward, inverse
+
+SYMMETRIES, INVERSE_SYMMETRIES = _build_symmetries()
+
+def canonical_key(game):
+    """返回 (归一化哈希, 对称编号)：8 种对称下 Zobrist 哈希的最小值"""
+    side = ZOBRIST_SIDE if game.current_player == 'White' else 0
+    best = None
+    for index, mapping in enumerate(SYMMETRIES):
+        key = side
+        for row, col in game.move_history:
+            cell = mapping[row * BOARD_SIZE + col]
+            key ^= ZOBRIST[game.board[row][col]][cell // BOARD_SIZE][cell % BOARD_SIZE]
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best
+
+class OpeningBook:
+    """只读的内存映射开局库"""
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, record_size, self.count = HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            magic = None  # 文件比文件头还短
+        # 记录数必须与文件长度相符，否则查找时会读到文件末尾之外
+        if (magic != MAGIC or version != VERSION or record_size != RECORD.size
+                or HEADER.size + self.count * RECORD.size > len(self.data)):
+            self.data.close()
+            raise ValueError(f"无效的开局库文件: {path}")
+
+    def close(self):
+        self.data.close()
+
+    def _key_at(self, index):
+        return struct.unpack_from("<Q", self.data, HEADER.size + index * RECORD.size)[0]
+
+    def entries(self, key):
+        """二分查找 key，返回该局面下所有 (归一化着法, 权重)"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        entries = []
+        while low < self.count:
+            record_key, move, weight = RECORD.unpack_from(self.data, HEADER.size + low * RECORD.size)
+            if record_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+        return entries
+
+    def lookup(self, game, rng=random):
+        """按权重随机选一个库内着法并映射回实际棋盘，不在库内时返回 None"""
+        if len(game.move_history) >= BOOK_MAX_PLIES:
+            return None
+        key, symmetry = canonical_key(game)
+        entries = [(move, weight) for move, weight in self.entries(key) if weight > 0]
+        if not entries:
+            return None
+        move = rng.choices([move for move, _ in entries], [weight for _, weight in entries])[0]
+        cell = INVERSE_SYMMETRIES[symmetry][move]
+        row, col = divmod(cell, BOARD_SIZE)
+        return (row, col) if game.is_valid_move(row, col) else None
+
+_book = None
+_book_loaded = False
+
+def get_opening_book():
+    """第一次调用时打开默认开局库，文件不存在则返回 None"""
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book_loaded = True
+        if os.path.exists(BOOK_PATH):
+            try:
+                _book = OpeningBook(BOOK_PATH)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"无法加载开局库: {e}")
+    return _book
+
+def count_game(counts, moves, max_plies):
+    """把一局棋的前 max_plies 步计入统计，输掉的一方的着法不计分"""
+    game = Game()
+    positions = []
+    for row, col in moves[:max_plies]:
+        key, symmetry = canonical_key(game)
+        positions.append((key, SYMMETRIES[symmetry][row * BOARD_SIZE + col], game.current_player))
+        if not game.make_move(row, col):
+            return
+    for row, col in moves[max_plies:]:
+        if game.winner or not game.make_move(row, col):
+            break
+    for key, move, player in positions:
+        if game.winner != opponent_of(player):
+            counts[(key, move)] = counts.get((key, move), 0) + 1
+
+def write_book(counts, path):
+    records = sorted(((key, move, min(weight, 0xFFFF)) for (key, move), weight in counts.items()),
+                     key=lambda record: (record[0], -record[2]))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(records)))
+        for record in records:
+            f.write(RECORD.pack(*record))
+    print(f"写入 {len(records)} 条开局记录到 {path}")
+
+def read_games(path):
+    """读取对局记录，每行一局，着法写成 row,col"""
+    games = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            moves = [tuple(int(x) for x in token.split(",")) for token in line.split()]
+            if moves:
+                games.append(moves)
+    return games
+
+def self_play_games(count, time_limit, seed):
+    """AI 自我对弈，前两步在天元附近随机落子以增加开局的多样性"""
+    from ai import choose_move
+    rng = random.Random(seed)
+    center = BOARD_SIZE // 2
+    games = []
+    for i in range(count):
+        game = Game()
+        for _ in range(2):
+            while not game.make_move(center + rng.randint(-2, 2), center + rng.randint(-2, 2)):
+                pass
+        while not game.is_over():
+            game.make_move(*choose_move(game, time_limit, use_book=False))
+        games.append(list(game.move_history))
+        print(f"自我对弈 {i + 1}/{count}: {game.get_winner()}，{len(game.move_history)} 步")
+    return games
+
+def main():
+    parser = argparse.ArgumentParser(description="生成五子棋开局库")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    selfplay = subparsers.add_parser("selfplay", help="用 AI 自我对弈生成")
+    selfplay.add_argument("games", type=int)
+    selfplay.add_argument("--time-limit", type=float, default=0.5)
+    selfplay.add_argument("--seed", type=int, default=0)
+    imported = subparsers.add_parser("import", help="从对局记录文件生成")
+    imported.add_argument("path")
+    for sub in (selfplay, imported):
+        sub.add_argument("--plies", type=int, default=BOOK_MAX_PLIES)
+        sub.add_argument("--output", default=BOOK_PATH)
+    args = parser.parse_args()
+
+    if args.command == "selfplay":
+        games = self_play_games(args.games, args.time_limit, args.seed)
+    else:
+        games = read_games(args.path)
+    counts = {}
+    for moves in games:
+        count_game(counts, moves, args.plies)
+    write_book(counts, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from common import Game, BOARD_SIZE
+from ai import AlphaBetaSearch, ordered_moves, AI_TIME_LIMIT, MAX_DEPTH
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+STOP_POLL = 0.05  # 等待工作进程时检查 stop_event 的间隔（秒）
+
+_executor = None
+_executor_workers = 0
+_stop_workers = None  # 进程池共享的停止标志；工作进程里由 _init_worker 设置为同一个对象
+
+def encode_game(game):
+    """把局面压缩成落子序列，每步一个字节"""
+    return bytes(row * BOARD_SIZE + col for row, col in game.move_history)
+
+def decode_game(data):
+    """按落子序列重放，得到哈希、候选和威胁索引都一致的 Game"""
+    game = Game()
+    for cell in data:
+        game.make_move(*divmod(cell, BOARD_SIZE))
+    return game
+
+def _init_worker(stop):
+    global _stop_workers
+    _stop_workers = stop
+
+def _ready():
+    return os.getpid()
+
+def get_executor(workers):
+    """复用进程池，进程数变化时才重建；用 spawn 避免复制主进程里的 pygame 和网络线程
+
+    新建的进程池会先启动所有工作进程并导入搜索代码，这段时间不计入第一次搜索的预算。
+    """
+    global _executor, _executor_workers, _stop_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_pool()
+        context = multiprocessing.get_context("spawn")
+        _stop_workers = context.Event()
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                        initializer=_init_worker, initargs=(_stop_workers,))
+        _executor_workers = workers
+        # 每次提交都会在没有空闲进程时新启动一个，提交 workers 个任务即可启动全部进程
+        for future in [_executor.submit(_ready) for _ in range(workers)]:
+            future.result()
+    return _executor
+
+def shutdown_pool():
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+        _executor_workers = 0
+
+def _search_group(data, moves, deadline, max_depth):
+    """工作进程：对分到的一组根着法逐层加深，返回每个完整深度的结果和节点数"""
+    game = decode_game(data)
+    search = AlphaBetaSearch(game, max(0.0, deadline - time.time()), max_depth, stop_event=_stop_workers)
+    return search.iterate(moves), search.nodes
+
+def parallel_search(game, time_limit=AI_TIME_LIMIT, workers=DEFAULT_WORKERS, max_depth=MAX_DEPTH,
+                    stop_event=None):
+    """把根节点候选分给多个进程搜索，返回 (最佳着法, 完成的深度, 总节点数)
+
+    每个进程在同一个截止时间前对自己那组着法逐层加深；只比较所有进程都完成了的最深一层，
+    保证各组分值出自同一深度。stop_event 被设置时通知所有工作进程停止，按已完成的深度返回。
+    """
+    moves = ordered_moves(game)
+    if not moves:
+        return None, 0, 0
+    workers = max(1, workers)
+    # 进程池始终按配置的进程数建立，根着法比进程少时只提交较少的组，避免重建进程池
+    executor = get_executor(workers)
+    groups = min(workers, len(moves))
+    deadline = time.time() + time_limit
+    data = encode_game(game)
+    _stop_workers.clear()
+    futures = [executor.submit(_search_group, data, moves[i::groups], deadline, max_depth)
+               for i in range(groups)]
+    pending = futures
+    while pending:
+        _, pending = wait(pending, timeout=STOP_POLL)
+        if pending and stop_event and stop_event.is_set():
+            _stop_workers.set()
+            for future in pending:
+                future.cancel()
+            # 正在运行的搜索看到停止标志后很快返回，等它们结束，免得占住进程影响下一次搜索
+            wait(pending)
+            break
+    results = [future.result() for future in futures if not future.cancelled()]
+
+    nodes = sum(group_nodes for _, group_nodes in results)
+    if len(results) < len(futures) or not all(group for group, _ in results):
+        return moves[0], 0, nodes
+    depth = min(max(group) for group, _ in results)
+    best, _ = max((group[depth] for group, _ in results), key=lambda result: result[1])
+    return best, depth, nodes
+
+def parallel_best_move(game, time_limit=AI_TIME_LIMIT, workers=DEFAULT_WORKERS, stop_event=None):
+    return parallel_search(game, time_limit, workers, stop_event=stop_event)[0]
@@ -0,0 +1,62 @@
+"""消息编码：紧凑的二进制格式和作为后备的 JSON 格式
+
+二进制消息（网络字节序）：
+    着法:     type(B) row(B) col(B) seq(H)      5 字节
+    控制消息: type(B) seq(H)                    3 字节
+seq 为发送方的消息序号，16 位回绕。JSON 消息总是以 "{" 开头，而二进制消息的类型字节都小于它，
+所以接收端不需要知道对方用哪种格式，按第一个字节区分即可。
+能否发送二进制消息在 connection_established 握手时协商，对方不支持时继续使用 JSON。
+"""
+import json
+import struct
+
+BINARY_VERSION = 1  # 本端支持的二进制协议版本，0 表示只用 JSON
+
+MOVE = 1
+CONTROL_TYPES = {"connection_established": 2, "start_game": 3}
+CONTROL_NAMES = {code: name for name, code in CONTROL_TYPES.items()}
+MOVE_FORMAT = struct.Struct("!BBBH")
+CONTROL_FORMAT = struct.Struct("!BH")
+JSON_START = ord("{")
+
+def encode_binary(message, seq):
+    """把消息编码成二进制；没有对应二进制格式的消息返回 None，由调用方改用 JSON"""
+    seq &= 0xFFFF
+    if message.keys() == {"move"}:
+        row, col = message["move"]
+        return MOVE_FORMAT.pack(MOVE, row, col, seq)
+    if message.keys() == {"type"} and message["type"] in CONTROL_TYPES:
+        return CONTROL_FORMAT.pack(CONTROL_TYPES[message["type"]], seq)
+    return None
+
+def negotiate_version(version):
+    """对端声明的二进制协议版本与本端取较小者；不是非负整数时返回 None"""
+    if type(version) is not int or version < 0:
+        return None
+    return min(version, BINARY_VERSION)
+
+def encode_json(message):
+    return json.dumps(message, separators=(",", ":")).encode()
+
+def encode_message(message, binary_version, seq):
+    """按协商的版本编码一条消息，返回 (内容, 下一个序号)；只有二进制消息占用序号"""
+    if binary_version:
+        payload = encode_binary(message, seq)
+        if payload:
+            return payload, (seq + 1) & 0xFFFF
+    return encode_json(message), seq
+
+def decode(payload):
+    """解码一条消息，返回 (消息, 序号)；JSON 消息没有序号，返回 None"""
+    if not payload:
+        raise ValueError("空消息")
+    kind = payload[0]
+    if kind == JSON_START:
+        return json.loads(payload), None
+    if kind == MOVE:
+        _, row, col, seq = MOVE_FORMAT.unpack(payload)
+        return {"move": [row, col]}, seq
+    if kind in CONTROL_NAMES:
+        _, seq = CONTROL_FORMAT.unpack(payload)
+        return {"type": CONTROL_NAMES[kind]}, seq
+    raise ValueError(f"未知的消息类型: {kind}")
@@ -0,0 +1,113 @@
+import time
+from common import FIVE, OPEN_FOUR, FOUR, OPEN_THREE, opponent_of
+
+VCF_DEPTH = 12        # 连续冲四的最大进攻步数（每步含对手应手，约 24 层）
+VCT_DEPTH = 5         # 连续活三/冲四的最大进攻步数
+MAX_NODES = 4000      # 单次求解的节点上限，超过则放弃
+MAX_CACHE = 200000    # 证明缓存的条目上限，超过后清空
+CACHE_ENTRY_BYTES = 200  # 证明缓存每个条目大约占用的内存（字节）
+
+class BudgetExceeded(Exception):
+    """求解超过节点预算或截止时间"""
+
+class ThreatSpaceSearch:
+    """只在冲四（VCF）或冲四加活三（VCT）上展开的必胜搜索"""
+    def __init__(self, max_nodes=MAX_NODES, max_cache=MAX_CACHE):
+        self.max_nodes = max_nodes
+        self.max_cache = max_cache
+        # (局面哈希, 是否允许活三) -> (已搜索深度, 必胜着法或 None)
+        self.cache = {}
+        self.nodes = 0
+        self.stop_event = None
+        self.deadline = None
+
+    def find_vcf(self, game, depth=VCF_DEPTH, stop_event=None, deadline=None):
+        """当前行棋方若能连续冲四取胜，返回第一步，否则返回 None；deadline 为 perf_counter 截止时间"""
+        return self._solve(game, depth, False, stop_event, deadline)
+
+    def find_vct(self, game, depth=VCT_DEPTH, stop_event=None, deadline=None):
+        """当前行棋方若能用连续活三和冲四取胜，返回第一步，否则返回 None"""
+        return self._solve(game, depth, True, stop_event, deadline)
+
+    def _solve(self, game, depth, allow_three, stop_event=None, deadline=None):
+        if len(self.cache) > self.max_cache:
+            self.cache.clear()
+        self.nodes = 0
+        self.stop_event = stop_event
+        self.deadline = deadline
+        try:
+            return self._attack(game, depth, allow_three)
+        except BudgetExceeded:
+            return None
+
+    def _attack(self, game, depth, allow_three):
+        """进攻方行棋：返回能保证取胜的着法"""
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.stop_event and self.stop_event.is_set()):
+            raise BudgetExceeded()
+        if self.deadline and time.perf_counter() > self.deadline:
+            raise BudgetExceeded()
+        attacker = game.current_player
+        own = game.threats[attacker]
+        opponent = game.threats[opponent_of(attacker)]
+        if own[FIVE]:
+            return next(iter(own[FIVE]))
+        if len(opponent[FIVE]) > 1:
+            return None
+        if own[OPEN_FOUR] and not opponent[FIVE]:
+            return next(iter(own[OPEN_FOUR]))
+        if depth == 0:
+            return None
+
+        key = (game.hash, allow_three)
+        cached = self.cache.get(key)
+        if cached and (cached[1] is not None or cached[0] >= depth):
+            return cached[1]
+
+        moves = own[FOUR] | own[OPEN_FOUR]
+        # 对手没有冲四可以反击时，活三才构成先手
+        if allow_three and not (opponent[FOUR] or opponent[OPEN_FOUR]):
+            moves = moves | own[OPEN_THREE]
+        if opponent[FIVE]:
+            # 对手已成四，只有同时挡住它的进攻着法才可行
+            moves = moves & opponent[FIVE]
+
+        result = None
+        for move in moves:
+            game.make_move(*move)
+            try:
+                proven = self._defend(game, depth, allow_three)
+            finally:
+                game.unmake_move()
+            if proven:
+                result = move
+                break
+        self.cache[key] = (depth, result)
+        return result
+
+    def _defend(self, game, depth, allow_three):
+        """防守方行棋：所有应手都无法化解时返回 True"""
+        defender = game.current_player
+        attacker = opponent_of(defender)
+        if game.threats[defender][FIVE]:
+            return False
+        attacks = game.threats[attacker]
+        if len(attacks[FIVE]) > 1:
+            return True
+        if attacks[FIVE]:
+            replies = attacks[FIVE]
+        elif attacks[OPEN_FOUR]:
+            # 活三：堵住能形成四的点，或者用自己的冲四反击
+            defences = game.threats[defender]
+            replies = attacks[OPEN_FOUR] | attacks[FOUR] | defences[FOUR] | defences[OPEN_FOUR]
+        else:
+            return False
+        for reply in list(replies):
+            game.make_move(*reply)
+            try:
+                refuted = self._attack(game, depth - 1, allow_three) is None
+            finally:
+                game.unmake_move()
+            if refuted:
+                return False
+        return True
@@ -0,0 +1,147 @@
+"""无界面的 AI 对 AI 比赛，不依赖 pygame
+
+    python tournament.py --games 100 --a engine=alphabeta,time_limit=0.5 --b engine=mcts,time_limit=0.5
+    python main.py tournament --games 20 --workers 4 --opening-plies 2
+
+引擎配置写成逗号分隔的 key=value，直接作为 ai.choose_move 的参数；
+level=easy 之类会展开成 ai.DIFFICULTY_LEVELS 中对应难度的参数，其余参数可以覆盖它。
+每两局使用同一个随机开局并交换先后手，结果按引擎 A 的视角统计。
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from common import Game, BOARD_SIZE, opponent_of
+
+def parse_engine(text):
+    """把 "engine=mcts,time_limit=0.5" 解析成 choose_move 的关键字参数"""
+    from ai import DIFFICULTY_LEVELS
+    config = {}
+    for item in filter(None, text.split(",")):
+        key, value = item.split("=", 1)
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        else:
+            if value in ("True", "False"):
+                value = value == "True"
+        key = key.strip()
+        if key == "level":
+            config = {**DIFFICULTY_LEVELS[value], **config}
+        else:
+            config[key] = value
+    return config
+
+def random_opening(plies, seed):
+    """在天元附近随机落 plies 子"""
+    rng = random.Random(seed)
+    center = BOARD_SIZE // 2
+    moves = []
+    game = Game()
+    while len(moves) < plies:
+        move = (center + rng.randint(-2, 2), center + rng.randint(-2, 2))
+        if game.make_move(*move):
+            moves.append(move)
+    return moves
+
+def play_game(index, config_a, config_b, opening):
+    """下一局，index 为偶数时 A 执黑；返回 (A 的得分, 步数, 耗时)
+
+    两个引擎各用一份新的置换表、证明缓存和 MCTS 搜索树，互不共享，也不带入上一局的状态。
+    """
+    from ai import choose_move, EngineState, use_engine_state
+    game = Game()
+    for move in opening:
+        game.make_move(*move)
+    a_color = 'Black' if index % 2 == 0 else 'White'
+    states = {'Black': EngineState(), 'White': EngineState()}
+    start = time.perf_counter()
+    while not game.is_over():
+        config = config_a if game.current_player == a_color else config_b
+        use_engine_state(states[game.current_player])
+        move = choose_move(game, **config)
+        if move is None or not game.make_move(*move):
+            # 引擎给不出合法着法按负局处理
+            game.winner = opponent_of(game.current_player)
+            break
+    elapsed = time.perf_counter() - start
+    if game.winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if game.winner == a_color else 0.0
+    return score, len(game.move_history), elapsed
+
+def elo_interval(scores, z=1.96):
+    """由每局得分估计 Elo 差及其置信区间
+
+    区间用平均得分的 Wilson 区间换算，全胜或全负时仍有宽度；得分为 0 或 1 的一端对应无穷大的 Elo 差。
+    """
+    n = len(scores)
+    mean = sum(scores) / n
+    scale = 1 + z * z / n
+    center = (mean + z * z / (2 * n)) / scale
+    half = z * math.sqrt(mean * (1 - mean) / n + z * z / (4 * n * n)) / scale
+
+    def to_elo(p):
+        if p <= 0:
+            return -math.inf
+        if p >= 1:
+            return math.inf
+        return -400 * math.log10(1 / p - 1)
+
+    return to_elo(mean), to_elo(max(0.0, center - half)), to_elo(min(1.0, center + half))
+
+def run_tournament(games, config_a, config_b, workers=1, opening_plies=0, seed=0):
+    openings = [random_opening(opening_plies, seed + index // 2) for index in range(games)]
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(play_game, range(games), [config_a] * games, [config_b] * games,
+                                        openings))
+    else:
+        results = [play_game(index, config_a, config_b, openings[index]) for index in range(games)]
+    elapsed = time.perf_counter() - start
+
+    scores = [score for score, _, _ in results]
+    wins = scores.count(1.0)
+    draws = scores.count(0.5)
+    losses = scores.count(0.0)
+    elo, low, high = elo_interval(scores)
+    return {
+        "games": games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "elo": elo,
+        "elo_low": low,
+        "elo_high": high,
+        "average_plies": sum(plies for _, plies, _ in results) / games,
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面 AI 对 AI 比赛")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--a", default="engine=alphabeta,time_limit=0.5", help="引擎 A 的配置")
+    parser.add_argument("--b", default="engine=mcts,time_limit=0.5", help="引擎 B 的配置")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--opening-plies", type=int, default=2, help="每局开头随机落子的步数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = run_tournament(args.games, parse_engine(args.a), parse_engine(args.b),
+                            args.workers, args.opening_plies, args.seed)
+    print(f"A: {args.a}  B: {args.b}")
+    print(f"A 胜/和/负: {result['wins']}/{result['draws']}/{result['losses']}  "
+          f"Elo 差 {result['elo']:+.0f} (95% 区间 {result['elo_low']:+.0f} ~ {result['elo_high']:+.0f})")
+    print(f"平均 {result['average_plies']:.1f} 步, 用时 {result['elapsed']:.1f}s, "
+          f"{result['games_per_second']:.3f} 局/秒")
+    return result
+
+if __name__ == "__main__":
+    main()
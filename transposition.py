@@ -0,0 +1,75 @@
+from array import array
+from common import BOARD_SIZE
+
+# 置换表条目的边界类型
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# 每个槽位占用的字节数：key(8) + score(8) + depth(1) + flag(1) + move(2) + age(2)
+ENTRY_BYTES = 22
+DEFAULT_TT_MB = 16
+
+class TranspositionTable:
+    """固定槽位数的置换表，内存在创建时一次性分配，不会超过 size_mb"""
+    def __init__(self, size_mb=DEFAULT_TT_MB):
+        self.size_mb = size_mb
+        self.size = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.keys = array('Q', bytes(8 * self.size))
+        self.scores = array('q', bytes(8 * self.size))
+        self.depths = array('b', [-1]) * self.size  # -1 表示空槽
+        self.flags = array('b', bytes(self.size))
+        self.moves = array('h', bytes(2 * self.size))
+        self.ages = array('H', bytes(2 * self.size))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """每次搜索开始时调用，旧代的条目会被优先替换"""
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    def clear(self):
+        self.depths = array('b', [-1]) * self.size
+        self.generation = 0
+
+    def probe(self, key):
+        """命中时返回 (depth, flag, score, move)，否则返回 None"""
+        index = key % self.size
+        if self.depths[index] >= 0 and self.keys[index] == key:
+            self.hits += 1
+            move = self.moves[index]
+            move = divmod(move, BOARD_SIZE) if move >= 0 else None
+            return self.depths[index], self.flags[index], self.scores[index], move
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        """深度优先替换：空槽、旧代条目或搜索深度不低于原条目时写入，同一局面也不用浅结果覆盖深结果"""
+        index = key % self.size
+        stored_depth = self.depths[index]
+        if stored_depth >= 0:
+            if self.ages[index] == self.generation and depth < stored_depth:
+                return False
+            if self.keys[index] != key:
+                self.overwrites += 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.scores[index] = score
+        self.moves[index] = move[0] * BOARD_SIZE + move[1] if move else -1
+        self.ages[index] = self.generation
+        self.stores += 1
+        return True
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "size_mb": self.size_mb,
+            "entries": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
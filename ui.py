@@ -2,7 +2,7 @@ import pygame
 import sys
 from common import Game, SCREEN_SIZE, GRID_SIZE, BOARD_SIZE, MARGIN
 from network import start_network_game, get_available_rooms, start_discovery_service, check_for_new_connection, start_server
-from ai import ai_move
+from ai import ai_move, DIFFICULTY_LEVELS
 
 pygame.init()
 pygame.font.init()
@@ -19,6 +19,7 @@ BOARD_COLOR = (250, 214, 165)  # 添加这行，定义棋盘背景色
 # 字体设置
 FONT_PATH = "fonts/SimHei.ttf"
 FONT_SIZE = 32
+DIFFICULTY_LABELS = {"easy": "简单", "normal": "普通", "hard": "困难", "master": "大师"}
 
 def load_font(size):
     try:
@@ -89,15 +90,19 @@ def main_menu():
                     sys.exit()
 
 def game_mode_selection():
-    """选择游戏模式（AI 或玩家对战）"""
+    """选择游戏模式，返回 ("AI", 难度) 或 ("Player", None)"""
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE))
     pygame.display.set_caption("五子棋模式选择")
 
     screen.fill(BOARD_COLOR)  # 使用棋盘颜色作为背景
 
-    ai_button = draw_button(screen, "对战AI", SCREEN_SIZE // 4, SCREEN_SIZE // 3, 250, 50)
-    player_button = draw_button(screen, "玩家对战", SCREEN_SIZE // 4, SCREEN_SIZE // 2, 250, 50)
+    ai_buttons = {}
+    for i, level in enumerate(DIFFICULTY_LEVELS):
+        ai_buttons[level] = draw_button(screen, f"对战AI（{DIFFICULTY_LABELS.get(level, level)}）",
+                                        SCREEN_SIZE // 4, SCREEN_SIZE // 4 + i * 70, 250, 50)
+    player_button = draw_button(screen, "玩家对战", SCREEN_SIZE // 4,
+                                SCREEN_SIZE // 4 + len(DIFFICULTY_LEVELS) * 70 + 30, 250, 50)
 
     while True:
         pygame.display.flip()
@@ -106,10 +111,11 @@ def game_mode_selection():
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if ai_button.collidepoint(event.pos):
-                    return "AI"
-                elif player_button.collidepoint(event.pos):
-                    return "Player"
+                for level, button in ai_buttons.items():
+                    if button.collidepoint(event.pos):
+                        return "AI", level
+                if player_button.collidepoint(event.pos):
+                    return "Player", None
 
 def input_port():
     """让用户输入端口号"""
@@ -222,11 +228,11 @@ def waiting_room(is_host=True, network=None):
             if is_host and not connection_established:
                 client_socket = check_for_new_connection(network.server_socket)
                 if client_socket:
-                    network.client = client_socket  # 设置客户端 socket
+                    network.attach(client_socket)  # 设置客户端 socket 并开始接收
                     connection_established = True
                     message = "其他玩家加入。点击 '开始游戏' 开始游戏。"
                     print("Client connected.")
-                    network.send({"type": "connection_established"})
+                    network.send(network.handshake_message())
             else:
                 data = network.check_network_data()
                 if data:
@@ -234,6 +240,7 @@ def waiting_room(is_host=True, network=None):
                     if isinstance(data, dict):
                         if data.get("type") == "connection_established":
                             print("Connection established")
+                            network.negotiate(data)
                             connection_established = True
                             message = "已连接到主机。等待游戏开始..."
                         elif data.get("type") == "start_game":